@@ -0,0 +1,84 @@
+# Pen-visit report generation: N single create_pdf calls (the per-scan path, full-resolution plot and
+# derivatives each time) against tuklas.batch_report, serially and across a process pool, as one PDF and as a ZIP,
+# plus the batch PDF with each case's own PDF attached in a throwaway case store.
+# Detections come from the NumPy stub in pipeline.py, so only report work is timed.
+# Usage: python benchmarks/batch_report.py [--cases 200] [--size 1920x1080] [--workers 4]
+import argparse
+import io
+import os
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from pipeline import StubBackend, synthetic_jpeg
+from tuklas import core
+from tuklas.batch_report import build_batch_pdf, build_batch_zip, case_payload, make_pool
+from tuklas.imaging import make_derivatives
+from tuklas.knowledge import knowledge_index
+from tuklas.report import create_pdf
+from tuklas.store import CaseStore
+
+DISTINCT_IMAGES = 8
+
+def single_reports(model, cases, case_ids):
+    for (name, img, dets), case_id in zip(cases, case_ids):
+        annotated = Image.fromarray(core.plot_detections(img, dets, model.names))
+        contrast, edge = make_derivatives(img)
+        summary = core.summarize(dets, model.names, img.size)
+        top = summary["ranking"][0] if summary["ranking"] else None
+        create_pdf([img, annotated, contrast, edge], top["class"] if top else "No lesions", summary["confidence"],
+                   knowledge_index(model.names).info(top["class_id"]) if top else None, case_id=case_id,
+                   ranking=summary["ranking"])
+
+def timed(label, n, fn, baseline=None):
+    t = time.perf_counter()
+    out = fn()
+    seconds = time.perf_counter() - t
+    line = f"  {label:<34} {seconds:7.2f} s   {seconds / n * 1000:7.1f} ms/case"
+    if baseline:
+        line += f"   {baseline / seconds:5.1f}x"
+    if isinstance(out, bytes):
+        line += f"   {len(out) / 1e6:6.1f} MB"
+    print(line)
+    return seconds
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cases", type=int, default=200)
+    parser.add_argument("--size", default="1920x1080")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+    width, height = map(int, args.size.split("x"))
+
+    model = StubBackend()
+    images = [Image.open(io.BytesIO(synthetic_jpeg(width, height, seed))).convert("RGB")
+              for seed in range(DISTINCT_IMAGES)]
+    cases = []
+    for i in range(args.cases):
+        img = images[i % DISTINCT_IMAGES]
+        cases.append((f"case_{i:04d}.jpg", img, core.predict(model, [img], 0.25)[0]))
+
+    print(f"{args.cases} cases at {width}x{height}, {args.workers} workers")
+    n = args.cases
+    with tempfile.TemporaryDirectory() as tmp:
+        # Stored cases, so every report carries its verify QR code as a real scan's does.
+        store = CaseStore(os.path.join(tmp, "cases.db"))
+        case_ids = store.add_cases([core.case_record(name, dets, model.names, img.size) for name, img, dets in cases])
+        baseline = timed("single create_pdf x N", n, lambda: single_reports(model, cases, case_ids))
+        payloads = []
+        timed("payloads (one downsample each)", n,
+              lambda: payloads.extend(case_payload(name, img, dets, model.names, case_id)
+                                      for (name, img, dets), case_id in zip(cases, case_ids)))
+        timed("batch PDF, serial", n, lambda: build_batch_pdf(payloads), baseline)
+        with make_pool(args.workers) as pool:
+            pool.submit(int).result()  # worker start-up is paid once per app, not per report
+            timed("batch PDF, pool", n, lambda: build_batch_pdf(payloads, pool=pool), baseline)
+            timed("batch PDF + attach, pool", n, lambda: build_batch_pdf(payloads, pool=pool, store=store), baseline)
+            timed("ZIP of case PDFs, pool", n, lambda: build_batch_zip(payloads, pool=pool), baseline)
+        store.close()
+
+if __name__ == "__main__":
+    main()
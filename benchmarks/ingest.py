@@ -0,0 +1,74 @@
+# Peak memory and decode time per upload: the old Image.open(...).convert("RGB") against tuklas.images.load_image
+# at the sizes the app asks for. Each variant runs in a fresh process and reports the growth of its peak RSS
+# (VmHWM, which unlike ru_maxrss is not inherited from the parent), since Pillow's pixel buffers bypass
+# tracemalloc. The sample is a phone-style JPEG with EXIF rotation. Linux only.
+# Usage: python benchmarks/ingest.py [--size 4000x3000] [--runs 5] [IMAGE]
+import argparse
+import io
+import os
+import subprocess
+import sys
+import time
+
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline import synthetic_jpeg
+from tuklas.images import ingest_side, load_image
+
+VARIANTS = {
+    "open + convert (before)": lambda data: Image.open(io.BytesIO(data)).convert("RGB"),
+    "load_image, full size": lambda data: load_image(io.BytesIO(data)),
+    "load_image, tiling auto": lambda data: load_image(io.BytesIO(data), ingest_side(640, "auto")),
+    "load_image, tiling off": lambda data: load_image(io.BytesIO(data), ingest_side(640, "off")),
+}
+
+def peak_kb():
+    with open("/proc/self/status") as f:
+        return int(next(line for line in f if line.startswith("VmHWM:")).split()[1])
+
+def measure(variant, path, runs):
+    with open(path, "rb") as f:
+        data = f.read()
+    base = peak_kb()
+    samples = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        img = VARIANTS[variant](data)
+        samples.append(time.perf_counter() - t)
+        size = img.size
+        del img
+    print(f"{size[0]}x{size[1]} {(peak_kb() - base) / 1024:.1f} {min(samples) * 1000:.1f}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("image", nargs="?", help="Sample photo (default: synthetic JPEG)")
+    parser.add_argument("--size", default="4000x3000")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--variant", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    path = args.image
+    if args.variant:
+        measure(args.variant, path, args.runs)
+        return
+    if path is None:
+        width, height = map(int, args.size.split("x"))
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"_ingest_{width}x{height}.jpg")
+        img = Image.open(io.BytesIO(synthetic_jpeg(width, height, 0)))
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 CW, as a portrait phone photo is stored
+        img.save(path, quality=90, exif=exif)
+
+    print(f"{path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+    print(f"  {'variant':<26} {'output':>10} {'peak RSS':>10} {'decode':>10}")
+    for variant in VARIANTS:
+        out = subprocess.run([sys.executable, __file__, path, "--variant", variant, "--runs", str(args.runs)],
+                             capture_output=True, text=True, check=True).stdout.split()
+        print(f"  {variant:<26} {out[0]:>10} {out[1]:>7} MB {out[2]:>7} ms")
+    if args.image is None:
+        os.remove(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# Load test for the local HTTP API (tuklas serve): N concurrent keep-alive clients posting one photo, reporting
+# throughput, tail latency and status codes. Stdlib asyncio only, so it runs on the farm PC itself.
+# Each request gets a unique trailer after the JPEG end marker, so every scan misses the server's result cache
+# and runs inference; --same-upload sends identical bytes to measure the cached path instead.
+# Usage: python benchmarks/load_test.py [IMAGE] [--url http://127.0.0.1:8765] [--endpoint scan]
+#                                       [--clients 16] [--requests 200] [--same-upload] [--start-server]
+import argparse
+import asyncio
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.parse
+import urllib.request
+import uuid
+from collections import Counter
+
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from pipeline import synthetic_jpeg
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def multipart(file_name, data, fields):
+    boundary = uuid.uuid4().hex
+    parts = [f'--{boundary}\r\nContent-Disposition: form-data; name="{k}"\r\n\r\n{v}\r\n'.encode()
+             for k, v in fields.items()]
+    parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="image"; filename="{file_name}"\r\n'
+                 f'Content-Type: application/octet-stream\r\n\r\n'.encode() + data + b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode())
+    return f"multipart/form-data; boundary={boundary}", b"".join(parts)
+
+async def read_response(reader):
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+async def client(url, make_request, remaining, latencies, statuses):
+    reader, writer = await asyncio.open_connection(url.hostname, url.port)
+    try:
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            request = make_request()
+            t = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status = await read_response(reader)
+            latencies.append(time.perf_counter() - t)
+            statuses[status] += 1
+    finally:
+        writer.close()
+
+async def run(url, make_request, clients, total):
+    remaining, latencies, statuses = [total], [], Counter()
+    start = time.perf_counter()
+    await asyncio.gather(*(client(url, make_request, remaining, latencies, statuses) for _ in range(clients)))
+    return time.perf_counter() - start, latencies, statuses
+
+def wait_healthy(base, timeout=180):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{base}/health", timeout=2) as r:
+                return json.load(r)
+        except OSError:
+            time.sleep(0.5)
+    raise SystemExit(f"Server at {base} did not become healthy within {timeout} s")
+
+def percentile_ms(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))] * 1000
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("image", nargs="?", help="Upload to send (default: synthetic 1920x1080 JPEG)")
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--endpoint", default="scan", choices=["scan", "report", "health"])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--conf", type=float, default=0.40)
+    parser.add_argument("--same-upload", action="store_true", help="Send identical bytes (result cache hits)")
+    parser.add_argument("--start-server", action="store_true", help="Launch `tuklas serve` for the run")
+    args = parser.parse_args()
+
+    url = urllib.parse.urlsplit(args.url)
+    server = None
+    if args.start_server:
+        server = subprocess.Popen([sys.executable, "-m", "tuklas", "serve", "--port", str(url.port)], cwd=ROOT)
+    try:
+        health = wait_healthy(args.url)
+        if args.image:
+            with open(args.image, "rb") as f:
+                file_name, data = os.path.basename(args.image), f.read()
+        else:
+            file_name, data = "synthetic.jpg", synthetic_jpeg(1920, 1080, 0)
+        width, height = Image.open(io.BytesIO(data)).size
+        method = "GET" if args.endpoint == "health" else "POST"
+        head = f"{method} /{args.endpoint} HTTP/1.1\r\nHost: {url.netloc}\r\n"
+
+        def make_request():
+            if args.endpoint == "health":
+                return (head + "\r\n").encode()
+            upload = data if args.same_upload else data + uuid.uuid4().bytes
+            content_type, body = multipart(file_name, upload, {"conf": args.conf})
+            return (head + f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n\r\n").encode() + body
+
+        elapsed, latencies, statuses = asyncio.run(run(url, make_request, args.clients, args.requests))
+        print(f"{method} /{args.endpoint} {file_name} ({width}x{height}, {len(data) / 1e6:.1f} MB) against "
+              f"{health['backend']} | {args.clients} clients, {args.requests} requests")
+        print(f"  throughput {len(latencies) / elapsed:7.2f} req/s over {elapsed:.1f} s")
+        print(f"  latency    mean {statistics.mean(latencies) * 1000:.0f} ms | p50 {percentile_ms(latencies, 50):.0f} "
+              f"| p95 {percentile_ms(latencies, 95):.0f} | p99 {percentile_ms(latencies, 99):.0f} "
+              f"| max {max(latencies) * 1000:.0f} ms")
+        print(f"  status     {dict(sorted(statuses.items()))}")
+        with urllib.request.urlopen(f"{args.url}/health", timeout=5) as r:
+            queue = json.load(r)["queue"]
+        print(f"  server     mean batch {queue['mean_batch']} | queue wait p50 {queue['wait_p50_ms']:.0f} ms "
+              f"/ p95 {queue['wait_p95_ms']:.0f} ms")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    main()
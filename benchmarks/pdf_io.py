@@ -0,0 +1,68 @@
+# Compares the old temp_*.jpg disk round-trip against the in-memory report pipeline.
+# Usage: python benchmarks/pdf_io.py [--size 4000x3000] [--runs 10]
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image, ImageEnhance, ImageFilter, ImageOps
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tuklas import report
+
+def make_panels(width, height):
+    rng = np.random.default_rng(0)
+    img = Image.fromarray(rng.integers(0, 255, (height, width, 3), dtype=np.uint8))
+    contrast = ImageEnhance.Contrast(img).enhance(1.5)
+    edge = ImageOps.invert(ImageOps.grayscale(img).filter(ImageFilter.FIND_EDGES))
+    return [img, img.copy(), contrast, edge]
+
+def disk_roundtrip(panels, workdir):
+    # Mirrors the previous app flow: save each panel at full size, then let FPDF read the files back.
+    paths = []
+    for name, img in zip(["orig", "annotated", "contrast", "edge"], panels):
+        path = os.path.join(workdir, f"temp_{name}.jpg")
+        img.save(path)
+        paths.append(path)
+    pdf = report.PDFReport()
+    pdf.add_page()
+    for i, path in enumerate(paths):
+        pdf.image(path, x=12 + 47 * i, y=50, w=43, h=35)
+    return pdf.output(dest='S').encode('latin-1')
+
+def in_memory(panels):
+    pdf = report.PDFReport()
+    pdf.add_page()
+    for i, img in enumerate(panels):
+        pdf.image_from_info(f"panel{i}", report.jpeg_image_info(img), x=12 + 47 * i, y=50, w=43, h=35)
+    return pdf.output(dest='S').encode('latin-1')
+
+def timeit(fn, runs):
+    samples = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        out = fn()
+        samples.append(time.perf_counter() - t)
+    return statistics.median(samples), len(out)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", default="4000x3000")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.split("x"))
+    panels = make_panels(width, height)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        disk_s, disk_bytes = timeit(lambda: disk_roundtrip(panels, workdir), args.runs)
+    mem_s, mem_bytes = timeit(lambda: in_memory(panels), args.runs)
+    print(f"{width}x{height}, median of {args.runs} runs")
+    print(f"  disk round-trip : {disk_s * 1000:8.1f} ms  ({disk_bytes / 1024:.0f} KiB PDF)")
+    print(f"  in-memory       : {mem_s * 1000:8.1f} ms  ({mem_bytes / 1024:.0f} KiB PDF)")
+    print(f"  speedup         : {disk_s / mem_s:8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# End-to-end scan-to-PDF benchmark: per-stage p50/p95 latency, throughput and peak memory.
+# Uses best.pt when present; otherwise an untrained YOLO11n built from yolo11n.yaml (no download), or a
+# deterministic NumPy stub when ultralytics itself is unavailable, so the non-model stages are still measured.
+# Usage: python benchmarks/pipeline.py [--sizes 640x480 1920x1080 4000x3000] [--runs 10] [--output FILE]
+#        python benchmarks/pipeline.py --compare old.json new.json
+import argparse
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from tuklas import core
+from tuklas.imaging import make_derivatives
+from tuklas.knowledge import medical_data, resolve_info
+from tuklas.report import create_pdf
+
+STAGES = ["decode", "predict", "plot", "derivatives", "smart_report", "pdf"]
+
+# --- 1. MODEL & INPUTS ---
+class StubBackend:
+    name = "stub"
+    names = {i: name for i, name in enumerate(medical_data)}
+
+    def predict_detections(self, images, conf):
+        out = []
+        for img in images:
+            w, h = img.size
+            rng = np.random.default_rng(w * h)
+            xy = rng.uniform(0, 0.7, (5, 2)) * [w, h]
+            wh = rng.uniform(0.05, 0.3, (5, 2)) * [w, h]
+            out.append(core.Detections(np.hstack([xy, xy + wh]), rng.uniform(0.3, 0.95, 5), rng.integers(0, 4, 5)))
+        return out
+
+def load_benchmark_model(backend):
+    if os.path.exists(core.MODEL_PATH):
+        return core.load_model(core.MODEL_PATH, backend=backend), "best.pt"
+    try:
+        from tuklas.backends import UltralyticsBackend
+        return UltralyticsBackend("yolo11n.yaml"), "yolo11n.yaml (untrained stand-in)"
+    except ImportError:
+        return StubBackend(), "numpy stub"
+
+def synthetic_jpeg(width, height, seed):
+    # Smooth colour field plus blotches: compresses and filters like a skin photo, unlike pure noise.
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = np.stack([180 + 40 * np.sin(xx / 97), 140 + 30 * np.cos(yy / 61), 130 + 20 * np.sin((xx + yy) / 45)], -1)
+    for cx, cy, r in zip(rng.uniform(0, width, 12), rng.uniform(0, height, 12), rng.uniform(0.02, 0.08, 12) * width):
+        base[(xx - cx) ** 2 + (yy - cy) ** 2 < r * r] *= 0.6
+    buf = io.BytesIO()
+    Image.fromarray(np.clip(base, 0, 255).astype(np.uint8)).save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+# --- 2. PIPELINE ---
+def run_pipeline(model, jpeg, conf, timings):
+    def stage(name, fn):
+        t = time.perf_counter()
+        out = fn()
+        timings[name].append(time.perf_counter() - t)
+        return out
+
+    img = stage("decode", lambda: Image.open(io.BytesIO(jpeg)).convert("RGB"))
+    dets = stage("predict", lambda: core.predict(model, [img], conf)[0])
+    annotated = stage("plot", lambda: Image.fromarray(core.plot_detections(img, dets, model.names)))
+    contrast, edge = stage("derivatives", lambda: make_derivatives(img))
+    summary = core.summarize(dets, model.names, img.size)
+    det_class = summary["classes"][0] if summary["classes"] else "Healthy"
+    stage("smart_report", lambda: core.generate_smart_report(det_class, summary["count"], summary["confidence"]))
+    info = resolve_info(det_class) or medical_data["Healthy"]
+    stage("pdf", lambda: create_pdf([img, annotated, contrast, edge], det_class, summary["confidence"], info,
+                                      case_id="TK-00000000-00000", ranking=summary["ranking"]))
+
+def percentile_ms(samples, q):
+    return round(float(np.percentile(samples, q)) * 1000, 2)
+
+def bench_size(model, width, height, runs, conf):
+    jpegs = [synthetic_jpeg(width, height, seed) for seed in range(min(runs, 4))]
+    run_pipeline(model, jpegs[0], conf, {s: [] for s in STAGES})
+    timings = {s: [] for s in STAGES}
+    start = time.perf_counter()
+    for i in range(runs):
+        run_pipeline(model, jpegs[i % len(jpegs)], conf, timings)
+    wall = time.perf_counter() - start
+
+    # Separate pass so tracemalloc's overhead never leaks into the latency numbers.
+    tracemalloc.start()
+    run_pipeline(model, jpegs[0], conf, {s: [] for s in STAGES})
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    totals = [sum(timings[s][i] for s in STAGES) for i in range(runs)]
+    return {
+        "size": f"{width}x{height}",
+        "runs": runs,
+        "throughput_img_s": round(runs / wall, 2),
+        "total_ms": {"p50": percentile_ms(totals, 50), "p95": percentile_ms(totals, 95)},
+        "stages_ms": {s: {"p50": percentile_ms(timings[s], 50), "p95": percentile_ms(timings[s], 95)} for s in STAGES},
+        "peak_traced_mb": round(peak / 2 ** 20, 1),
+    }
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# --- 3. REPORTING ---
+def print_result(result):
+    print(f"\n{result['size']}: {result['throughput_img_s']:.2f} img/s, total p50 {result['total_ms']['p50']:.1f} ms "
+          f"p95 {result['total_ms']['p95']:.1f} ms, peak {result['peak_traced_mb']:.1f} MB")
+    for s in STAGES:
+        print(f"  {s:<13} p50 {result['stages_ms'][s]['p50']:9.2f} ms   p95 {result['stages_ms'][s]['p95']:9.2f} ms")
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = {r["size"]: r for r in json.load(f)["results"]}
+    with open(new_path) as f:
+        new = json.load(f)["results"]
+    for result in new:
+        base = old.get(result["size"])
+        if base is None:
+            continue
+        print(f"\n{result['size']} (new / old p50)")
+        for s in STAGES + ["total"]:
+            a = (result["total_ms"] if s == "total" else result["stages_ms"][s])["p50"]
+            b = (base["total_ms"] if s == "total" else base["stages_ms"][s])["p50"]
+            flag = "  <-- regression" if b and a > b * 1.1 else ""
+            print(f"  {s:<13} {a:9.2f} ms vs {b:9.2f} ms  ({a / b if b else float('nan'):.2f}x){flag}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", nargs="+", default=["640x480", "1920x1080", "4000x3000"])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--conf", type=float, default=0.40)
+    parser.add_argument("--backend", help="Inference backend when best.pt is present")
+    parser.add_argument("--output", default="bench_pipeline.json")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two saved result files")
+    args = parser.parse_args()
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    model, model_desc = load_benchmark_model(args.backend)
+    results = []
+    for size in args.sizes:
+        width, height = (int(v) for v in size.split("x"))
+        results.append(bench_size(model, width, height, args.runs, args.conf))
+        print_result(results[-1])
+    payload = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "model": model_desc,
+        "backend": model.name,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(payload, f, indent=2)
+    print(f"\nSaved {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# Cold time-to-first-render of app.py with networking disabled, as measured by the app itself
+# (script start -> sidebar header painted).
+# Each run is a fresh interpreter, so imports are cold; uses Streamlit's AppTest harness (no browser).
+# Usage: python benchmarks/startup.py [--runs 3]
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import socket, time
+def _offline(*args, **kwargs):
+    raise OSError("network disabled for benchmark")
+socket.socket.connect = _offline
+socket.create_connection = _offline
+from streamlit.testing.v1 import AppTest
+t0 = time.perf_counter()
+at = AppTest.from_file("app.py", default_timeout=60).run()
+full_run_s = time.perf_counter() - t0
+assert not at.exception, at.exception
+print(f"{at.session_state.first_render_ms / 1000:.4f} {full_run_s:.4f}")
+"""
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    renders = []
+    for _ in range(args.runs):
+        out = subprocess.run([sys.executable, "-c", CHILD], cwd=ROOT, capture_output=True, text=True, check=True)
+        render_s, full_run_s = (float(v) for v in out.stdout.split()[-2:])
+        renders.append(render_s)
+        print(f"  first render {render_s * 1000:7.0f} ms  (whole first script run {full_run_s * 1000:.0f} ms)")
+    print(f"median first render: {statistics.median(renders) * 1000:.0f} ms over {args.runs} cold runs, offline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# Speed/recall trade-off of tiled vs single-pass inference on a sample set.
+# Labels are optional YOLO txt files (class cx cy w h, normalised) matched to images by file stem; with them the
+# report includes recall at IoU 0.5, overall and for small lesions (< 32 px on the model input in a single pass).
+# Without labels only latency and box counts are reported.
+# Usage: python benchmarks/tiling.py PATH [PATH ...] [--labels DIR] [--conf 0.25] [--backend onnx] [--runs 3]
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tuklas import core
+from tuklas.boxes import box_iou
+from tuklas.images import iter_path_images
+from tuklas.tiling import predict_tiled, tile_grid
+
+SMALL_PX = 32
+
+def load_labels(labels_dir, name, width, height):
+    stem = os.path.splitext(os.path.basename(name.split(":")[-1]))[0]
+    path = os.path.join(labels_dir, stem + ".txt")
+    if not os.path.exists(path):
+        return None
+    rows = np.loadtxt(path, ndmin=2).reshape(-1, 5)
+    cx, cy, w, h = rows[:, 1] * width, rows[:, 2] * height, rows[:, 3] * width, rows[:, 4] * height
+    return np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], 1), rows[:, 0].astype(np.int64)
+
+def matched(gt_xyxy, gt_cls, dets):
+    # Greedy class-aware matching: each ground-truth box is found if any same-class prediction overlaps it at IoU >= 0.5.
+    if len(dets) == 0 or len(gt_cls) == 0:
+        return np.zeros(len(gt_cls), dtype=bool)
+    iou = box_iou(gt_xyxy.astype(np.float32), dets.xyxy) * (gt_cls[:, None] == dets.cls[None, :])
+    return iou.max(axis=1) >= 0.5
+
+def median_ms(fn, runs):
+    samples = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        out = fn()
+        samples.append(time.perf_counter() - t)
+    return statistics.median(samples) * 1000, out
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="+", help="Sample images, directories or .zip archives")
+    parser.add_argument("--labels", help="Directory of YOLO-format label files")
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--backend", help="Inference backend (default: config)")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    model = core.load_model(core.MODEL_PATH, backend=args.backend, imgsz=args.imgsz)
+    stats = {mode: {"ms": [], "boxes": 0, "found": 0, "small_found": 0} for mode in ("single", "tiled")}
+    gt_total = small_total = images = 0
+    for name, img in iter_path_images(args.paths):
+        images += 1
+        width, height = img.size
+        core.predict(model, [img], args.conf)
+        single_ms, single = median_ms(lambda: core.predict(model, [img], args.conf)[0], args.runs)
+        tiled_ms, tiled = median_ms(lambda: predict_tiled(model, img, args.conf, args.imgsz), args.runs)
+        labels = load_labels(args.labels, name, width, height) if args.labels else None
+        if labels is not None:
+            gt_xyxy, gt_cls = labels
+            scale = args.imgsz / max(width, height)
+            small = np.minimum(gt_xyxy[:, 2] - gt_xyxy[:, 0], gt_xyxy[:, 3] - gt_xyxy[:, 1]) * scale < SMALL_PX
+            gt_total += len(gt_cls)
+            small_total += int(small.sum())
+        for mode, ms, dets in (("single", single_ms, single), ("tiled", tiled_ms, tiled)):
+            stats[mode]["ms"].append(ms)
+            stats[mode]["boxes"] += len(dets)
+            if labels is not None:
+                hit = matched(gt_xyxy, gt_cls, dets)
+                stats[mode]["found"] += int(hit.sum())
+                stats[mode]["small_found"] += int(hit[small].sum())
+        print(f"{name}: {width}x{height}, {len(tile_grid(width, height, args.imgsz))} tiles | "
+              f"single {single_ms:.0f} ms, {len(single)} boxes | tiled {tiled_ms:.0f} ms, {len(tiled)} boxes")
+
+    if not images:
+        print("No images found.", file=sys.stderr)
+        return
+    print(f"\n{images} images, backend {model.name}, conf {args.conf}")
+    for mode, s in stats.items():
+        line = (f"  {mode:<7} mean {statistics.mean(s['ms']):8.1f} ms/img   {1000 / statistics.mean(s['ms']):6.2f} img/s"
+                f"   {s['boxes'] / images:5.1f} boxes/img")
+        if gt_total:
+            line += f"   recall {s['found'] / gt_total:.3f}"
+            if small_total:
+                line += f"   small recall {s['small_found'] / small_total:.3f}"
+        print(line)
+    if gt_total:
+        print(f"  ground truth: {gt_total} boxes, {small_total} small (< {SMALL_PX} px at single-pass scale)")
+
+if __name__ == "__main__":
+    main()
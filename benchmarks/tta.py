@@ -0,0 +1,61 @@
+# Cost of high-accuracy mode: latency for 1..N test-time-augmentation views of one photo (one batched call),
+# the marginal cost of each added view, and how many views a given latency budget actually runs once the
+# ensemble has timed the model. Uses the same model fallbacks as benchmarks/pipeline.py.
+# Usage: python benchmarks/tta.py [--size 1920x1080] [--runs 5] [--budgets 250 500 1000 2000] [--backend pytorch]
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pipeline import load_benchmark_model, synthetic_jpeg
+from tuklas.core import predict
+from tuklas.tta import VIEWS, TTAEnsemble
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", default="1920x1080")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--conf", type=float, default=0.40)
+    parser.add_argument("--budgets", type=float, nargs="+", default=[250, 500, 1000, 2000])
+    parser.add_argument("--backend", default="pytorch")
+    args = parser.parse_args()
+
+    width, height = map(int, args.size.split("x"))
+    img = Image.open(io.BytesIO(synthetic_jpeg(width, height, 0))).convert("RGB")
+    model, label = load_benchmark_model(args.backend)
+    predict(model, [img], args.conf)
+
+    print(f"{label} | {width}x{height} | median of {args.runs} runs")
+    print(f"  {'views':<22} {'latency':>10} {'added view':>11} {'boxes':>6} {'uncertainty':>12}")
+    previous = None
+    for n in range(1, len(VIEWS) + 1):
+        ensemble = TTAEnsemble([model], budget_ms=float("inf"), max_views=n)
+        samples = []
+        for _ in range(args.runs):
+            t = time.perf_counter()
+            dets, tta = ensemble.predict(img, args.conf)
+            samples.append((time.perf_counter() - t) * 1000)
+        ms = statistics.median(samples)
+        added = f"{ms - previous:+8.0f} ms" if previous is not None else f"{'-':>11}"
+        print(f"  {f'{n}: + {VIEWS[n - 1][0]}':<22} {ms:7.0f} ms {added} {len(dets):>6} {tta['uncertainty']:>12.2f}")
+        previous = ms
+
+    print("  budget -> views run (after the first, calibrating scan)")
+    for budget in args.budgets:
+        ensemble = TTAEnsemble([model], budget_ms=budget)
+        ensemble.predict(img, args.conf)
+        runs, samples = [], []
+        for _ in range(args.runs):
+            _, tta = ensemble.predict(img, args.conf)
+            runs.append(tta["runs"])
+            samples.append(tta["elapsed_ms"])
+        print(f"  {budget:7.0f} ms -> {statistics.median(runs):.0f} views in {statistics.median(samples):.0f} ms")
+
+if __name__ == "__main__":
+    main()
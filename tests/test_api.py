@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+
+from tuklas.api import HTTPError, read_request
+
+def read(raw, limit=2 ** 16):
+    async def go():
+        reader = asyncio.StreamReader(limit=limit)
+        reader.feed_data(raw)
+        reader.feed_eof()
+        return await read_request(reader)
+    return asyncio.run(go())
+
+def test_body_is_read_to_content_length():
+    request = read(b"POST /scan HTTP/1.1\r\nContent-Length: 5\r\n\r\nhello")
+    assert (request.method, request.path, request.body) == ("POST", "/scan", b"hello")
+
+@pytest.mark.parametrize("length", [b"abc", b"-5", b"1.5"])
+def test_malformed_content_length_is_a_client_error(length):
+    with pytest.raises(HTTPError) as err:
+        read(b"POST /scan HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n")
+    assert err.value.status == 400
+
+@pytest.mark.parametrize("raw, status", [
+    (b"GET /" + b"a" * 200 + b" HTTP/1.1\r\n\r\n", 414),
+    (b"GET / HTTP/1.1\r\nX-Filler: " + b"a" * 200 + b"\r\n\r\n", 431),
+])
+def test_overlong_lines_are_a_client_error(raw, status):
+    with pytest.raises(HTTPError) as err:
+        read(raw, limit=64)
+    assert err.value.status == status
@@ -0,0 +1,72 @@
+import io
+import re
+import zipfile
+import zlib
+
+import pytest
+from PIL import Image
+
+from tuklas.batch_report import build_batch_pdf, build_batch_zip, case_payload
+from tuklas.core import Detections, case_record
+from tuklas.store import CaseStore
+
+NAMES = {0: "Erysipelas"}
+
+def cases(n):
+    dets = Detections([[10, 10, 60, 60]], [0.8], [0])
+    return [(f"pen/img {i}.jpg", Image.new("RGB", (640, 480), (120, 90, 80)), dets) for i in range(n)]
+
+def test_stored_cases_get_their_own_pdf_attached(tmp_path):
+    store = CaseStore(str(tmp_path / "cases.db"))
+    scans = cases(3)
+    case_ids = store.add_cases([case_record(name, dets, NAMES, img.size) for name, img, dets in scans])
+    payloads = [case_payload(name, img, dets, NAMES, case_id) for (name, img, dets), case_id in zip(scans, case_ids)]
+    batch = build_batch_pdf(payloads, store=store)
+    assert batch.startswith(b"%PDF")
+    reports = [store.get_report(case_id) for case_id in case_ids]
+    assert all(r.startswith(b"%PDF") for r in reports)
+    # Each attached report is the one-case document, not the whole pen visit.
+    assert all(len(r) < len(batch) for r in reports)
+    # Four photo panels and the verify QR code.
+    assert all(r.count(b"/Subtype /Image") == 5 for r in reports)
+    store.close()
+
+def test_unstored_cases_have_no_case_id_or_qr(tmp_path):
+    payloads = [case_payload(name, img, dets, NAMES) for name, img, dets in cases(2)]
+    assert [p["case_id"] for p in payloads] == [None, None]
+    # What the app keeps per scanned photo until the report is asked for: a report-sized JPEG, not pixels.
+    assert all(Image.open(io.BytesIO(p["jpeg"])).size == (516, 387) for p in payloads)
+    with zipfile.ZipFile(io.BytesIO(build_batch_zip(payloads))) as zf:
+        assert zf.namelist() == ["TUKLAS_Report_001_img_0.pdf", "TUKLAS_Report_002_img_1.pdf"]
+        assert all(zf.read(n).count(b"/Subtype /Image") == 4 for n in zf.namelist())
+
+def test_same_file_name_from_two_folders_gets_two_entries():
+    img, dets = Image.new("RGB", (64, 48)), Detections([], [], [])
+    payloads = [case_payload(name, img, dets, NAMES) for name in ("pen1/pig.jpg", "pen2/pig.jpg")]
+    with zipfile.ZipFile(io.BytesIO(build_batch_zip(payloads))) as zf:
+        assert zf.namelist() == ["TUKLAS_Report_001_pig.pdf", "TUKLAS_Report_002_pig.pdf"]
+
+def page_texts(pdf):
+    # Page content streams, by their footer; photo panels are JPEG streams and are skipped.
+    texts = []
+    for stream in re.findall(rb"stream\r?\n(.*?)\r?\nendstream", pdf, re.S):
+        try:
+            texts.append(zlib.decompress(stream).decode("latin-1"))
+        except zlib.error:
+            continue
+    return [t for t in texts if "Generated by TUKLAS AI" in t]
+
+def test_cover_index_points_past_a_case_that_runs_long():
+    # Forty classes push the first case's ranking table onto a second page (and the cover's findings too).
+    names = {i: f"Class {i}" for i in range(40)}
+    long_case = Detections([[0, 0, 10, 10]] * 40, [0.5] * 40, list(range(40)))
+    img = Image.new("RGB", (64, 48))
+    with pytest.warns(UserWarning, match="No knowledge base entry"):
+        payloads = [case_payload("a.jpg", img, long_case, names), case_payload("b.jpg", img, Detections([], [], []), names)]
+    pages = page_texts(build_batch_pdf(payloads))
+    first_case = next(n for n, text in enumerate(pages, 1) if "CASE INFORMATION" in text)
+    index = next(text for text in pages if "CASE INDEX" in text)
+    assert "{case" not in index
+    rows = re.findall(r"\((\d+)\) Tj.{0,200}?\(-\) Tj.{0,200}?\(([ab]\.jpg)\) Tj", index, re.S)
+    assert rows == [(str(first_case), "a.jpg"), (str(first_case + 2), "b.jpg")]
+    assert len(pages) == first_case + 2
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from tuklas.cache import ResultCache
+from tuklas.core import DETECTION_FLOOR, Detections, predict, predict_cached
+
+class SpreadModel:
+    # Deterministic boxes at confidences from 0.02 to 0.92, so every threshold keeps a different subset and the
+    # weakest box sits below DETECTION_FLOOR.
+    name = "fake"
+    names = {0: "a", 1: "b"}
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict_detections(self, images, conf):
+        self.calls += 1
+        scores = np.linspace(0.02, 0.92, 10)
+        boxes = np.arange(40, dtype=np.float32).reshape(10, 4) + [0, 0, 10, 10]
+        dets = Detections(boxes, scores, np.arange(10) % 2)
+        return [dets.filter(conf) for _ in images]
+
+def assert_same(a, b):
+    np.testing.assert_array_equal(a.xyxy, b.xyxy)
+    np.testing.assert_array_equal(a.conf, b.conf)
+    np.testing.assert_array_equal(a.cls, b.cls)
+
+@pytest.mark.parametrize("disk", [False, True])
+def test_cached_result_matches_direct_predict_at_any_threshold(tmp_path, disk):
+    model, img = SpreadModel(), Image.new("RGB", (64, 64))
+    cache = ResultCache(disk_dir=str(tmp_path) if disk else None)
+    predict_cached(model, cache, "k", img, 0.7)
+    if disk:
+        cache = ResultCache(disk_dir=str(tmp_path))
+    for conf in (0.9, 0.4, 0.1, DETECTION_FLOOR):
+        assert_same(predict_cached(model, cache, "k", img, conf), predict(model, [img], conf)[0])
+    # One model call for the first scan, then one per direct predict; the cache served every other threshold.
+    assert model.calls == 1 + 4
+    assert cache.stats()["hits"] == 4
+
+def test_threshold_below_the_floor_is_not_cached():
+    model, cache, img = SpreadModel(), ResultCache(), Image.new("RGB", (64, 64))
+    predict_cached(model, cache, "k", img, DETECTION_FLOOR / 2)
+    assert cache.get("k") is None
+
+def test_threshold_below_the_floor_bypasses_a_warm_cache():
+    model, cache, img = SpreadModel(), ResultCache(), Image.new("RGB", (64, 64))
+    predict_cached(model, cache, "k", img, 0.4)
+    low = predict_cached(model, cache, "k", img, 0.0)
+    assert_same(low, predict(model, [img], 0.0)[0])
+    assert low.conf.min() < DETECTION_FLOOR
+    assert cache.stats()["hits"] == 0
+    # The floor-level entry is still there for the next ordinary scan.
+    assert_same(predict_cached(model, cache, "k", img, 0.4), predict(model, [img], 0.4)[0])
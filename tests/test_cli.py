@@ -0,0 +1,60 @@
+import csv
+import json
+
+from PIL import Image
+
+from tuklas import cli, core
+from tuklas.core import Detections
+
+class FakeModel:
+    name = "fake"
+    names = {0: "Healthy", 1: "Diamond-shaped Plaques (Erysipelas)"}
+
+def fake_predict(model, images, conf, **kwargs):
+    # Red photos have one Erysipelas lesion; anything else is clean.
+    return [Detections([[4, 4, 20, 20]], [0.9], [1]) if img.getpixel((0, 0))[0] > 200 else Detections([], [], [])
+            for img in images]
+
+def scan(tmp_path, monkeypatch, *extra):
+    monkeypatch.setattr(core, "load_model", lambda *args, **kwargs: FakeModel())
+    monkeypatch.setattr(core, "predict", fake_predict)
+    monkeypatch.setenv("TUKLAS_STORE_PATH", "")
+    photos = tmp_path / "pen"
+    photos.mkdir()
+    Image.new("RGB", (64, 48), (230, 20, 20)).save(photos / "sick.jpg")
+    Image.new("RGB", (64, 48), (90, 90, 90)).save(photos / "clean.png")
+    (photos / "notes.txt").write_text("not a photo")
+    weights = tmp_path / "fake.pt"
+    weights.write_bytes(b"weights")
+    assert cli.main(["scan", str(photos), "--model", str(weights), *extra]) == 0
+
+def test_scan_writes_json_with_boxes_and_timing(tmp_path, monkeypatch):
+    out = tmp_path / "scan.json"
+    scan(tmp_path, monkeypatch, "--json", str(out))
+    payload = json.loads(out.read_text())
+    assert payload["timing"]["images"] == 2
+    results = {r["File"].rsplit("/", 1)[-1]: r for r in payload["results"]}
+    assert sorted(results) == ["clean.png", "sick.jpg"]
+    sick, clean = results["sick.jpg"], results["clean.png"]
+    assert sick["Diagnosis"] == "Diamond-shaped Plaques (Erysipelas)"
+    assert sick["Detections"] == 1 and sick["Confidence (%)"] == 90.0
+    assert sick["Boxes"] == [{"class": "Diamond-shaped Plaques (Erysipelas)", "confidence": 0.9,
+                              "box": [4.0, 4.0, 20.0, 20.0]}]
+    assert "Report" in sick
+    assert clean["Diagnosis"] == "No lesions" and clean["Boxes"] == [] and "Report" not in clean
+
+def test_scan_writes_csv_summary(tmp_path, monkeypatch):
+    out = tmp_path / "scan.csv"
+    scan(tmp_path, monkeypatch, "--csv", str(out))
+    with open(out, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["File"].rsplit("/", 1)[-1] for r in rows] == ["clean.png", "sick.jpg"]
+    assert list(rows[0])[:6] == ["File", "Diagnosis", "Severity", "Detections", "Confidence (%)", "Classes"]
+    assert rows[1]["Severity"].startswith("CRITICAL") and rows[1]["Detections"] == "1"
+    assert rows[0]["Detections"] == "0" and rows[0]["Severity"] == "-"
+
+def test_scan_prints_json_without_output_files(tmp_path, monkeypatch, capsys):
+    scan(tmp_path, monkeypatch)
+    captured = capsys.readouterr()
+    assert json.loads(captured.out)["timing"]["images"] == 2
+    assert "2 images" in captured.err
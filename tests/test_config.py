@@ -0,0 +1,23 @@
+import json
+
+from tuklas.config import DEFAULTS, load_config
+
+def test_defaults_without_file_or_environment(tmp_path):
+    config = load_config(str(tmp_path / "missing.json"))
+    assert config == DEFAULTS and config["offline"] is False and config["warmup_runs"] == 2
+
+def test_environment_overrides_file(tmp_path, monkeypatch):
+    path = tmp_path / "tuklas.json"
+    path.write_text(json.dumps({"offline": True, "threads": 2, "imgsz": 512}))
+    monkeypatch.setenv("TUKLAS_THREADS", "4")
+    monkeypatch.setenv("TUKLAS_WARMUP_RUNS", "0")
+    monkeypatch.setenv("TUKLAS_ALERT_THRESHOLDS", '{"CRITICAL": 2}')
+    config = load_config(str(path))
+    assert config["offline"] is True and config["imgsz"] == 512
+    assert config["threads"] == 4 and config["warmup_runs"] == 0
+    assert config["alert_thresholds"] == {"CRITICAL": 2}
+
+def test_offline_switch_from_environment(tmp_path, monkeypatch):
+    for value, expected in (("1", True), ("true", True), ("YES", True), ("0", False), ("off", False)):
+        monkeypatch.setenv("TUKLAS_OFFLINE", value)
+        assert load_config(str(tmp_path / "missing.json"))["offline"] is expected
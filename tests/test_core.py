@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from tuklas.backends import LatencyStats
+from tuklas.core import Detections, rank_classes, summarize, summary_row, warm_up
+
+ERYSIPELAS = "Diamond-shaped Plaques (Erysipelas)"
+MANGE = "Hyperkeratosis / Crusting (Sarcoptic Mange)"
+NAMES = {0: "Healthy", 1: ERYSIPELAS, 2: MANGE, 3: "Greasy / Exudative Skin (Greasy Pig Disease)"}
+
+def boxes(*found):
+    # (class, confidence) pairs, each as a 10x10 box.
+    return Detections([[0, 0, 10, 10]] * len(found), [c for _, c in found], [k for k, _ in found])
+
+def test_severity_outranks_box_count_and_confidence():
+    dets = boxes((0, 0.95), (0, 0.9), (0, 0.9), (2, 0.8), (1, 0.5))
+    assert [r["class"] for r in rank_classes(dets, NAMES)] == [ERYSIPELAS, MANGE, "Healthy"]
+
+def test_headline_confidence_is_not_diluted_by_other_classes():
+    dets = boxes((0, 0.95), (0, 0.95), (1, 0.5), (1, 0.7))
+    summary = summarize(dets, NAMES)
+    assert summary["classes"][0] == ERYSIPELAS
+    assert summary["confidence"] == pytest.approx(60.0)
+    assert summary["count"] == 4
+    row = summary_row("pig.jpg", dets, NAMES)
+    assert row["Diagnosis"] == ERYSIPELAS and row["Severity"].startswith("CRITICAL")
+    assert row["Confidence (%)"] == 60.0
+
+def test_equal_severity_falls_back_to_evidence_then_class_id():
+    # Both Healthy (OPTIMAL); 0.25 and 0.5 are exact in float32, so the sums tie exactly.
+    names = {0: "Healthy", 1: "Healthy skin"}
+    more_evidence = boxes((0, 0.25), (1, 0.5), (1, 0.5))
+    assert [r["class"] for r in rank_classes(more_evidence, names)] == ["Healthy skin", "Healthy"]
+    stronger_box = boxes((0, 0.25), (0, 0.25), (1, 0.5))
+    assert [r["class"] for r in rank_classes(stronger_box, names)] == ["Healthy skin", "Healthy"]
+    full_tie = boxes((1, 0.5), (0, 0.5))
+    assert [r["class"] for r in rank_classes(full_tie, names)] == ["Healthy", "Healthy skin"]
+
+def test_per_class_evidence():
+    dets = Detections([[0, 0, 10, 10], [0, 0, 20, 10], [0, 0, 10, 10]], [0.6, 0.8, 0.5], [2, 2, 0])
+    top = rank_classes(dets, NAMES, image_size=(100, 50))[0]
+    assert top["class"] == MANGE and top["severity"] == "MODERATE" and top["count"] == 2
+    assert top["mean_confidence"] == pytest.approx(70.0)
+    assert top["max_confidence"] == pytest.approx(80.0)
+    assert top["area_px"] == 300.0 and top["area_pct"] == pytest.approx(6.0)
+    assert rank_classes(dets, NAMES)[0]["area_pct"] is None
+
+def test_no_detections():
+    assert rank_classes(boxes(), NAMES) == []
+    assert summarize(boxes(), NAMES)["confidence"] == 0.0
+
+class CountingModel:
+    imgsz = 320
+
+    def __init__(self):
+        self.latency = LatencyStats()
+        self.frames = []
+
+    def predict_detections(self, images, conf):
+        self.frames += images
+        self.latency.record(0.5, len(images))
+        return [Detections([], [], []) for _ in images]
+
+def test_warm_up_runs_blank_frames_and_resets_latency():
+    model = CountingModel()
+    warm_up(model, 2)
+    assert len(model.frames) == 2
+    assert model.frames[0].shape == (320, 320, 3) and not np.any(model.frames[0])
+    # Warm-up passes are not real scans, so they must not skew the latency stats.
+    assert model.latency.images == 0 and model.latency.mean_ms == 0.0
+    warm_up(model, 0)
+    assert len(model.frames) == 2
@@ -0,0 +1,58 @@
+import io
+import zipfile
+
+from PIL import Image
+
+from tuklas.images import ingest_side, iter_path_images, load_image
+
+def encoded(img, fmt, **kwargs):
+    buf = io.BytesIO()
+    img.save(buf, format=fmt, **kwargs)
+    buf.seek(0)
+    return buf
+
+def test_exif_orientation_is_applied():
+    # Stored landscape, red on the left; orientation 6 means "rotate 90 degrees clockwise to display".
+    img = Image.new("RGB", (80, 40), (0, 0, 255))
+    img.paste((255, 0, 0), (0, 0, 40, 40))
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    loaded = load_image(encoded(img, "JPEG", exif=exif, quality=95))
+    assert loaded.size == (40, 80)
+    top, bottom = loaded.getpixel((20, 10)), loaded.getpixel((20, 70))
+    assert top[0] > 200 and top[2] < 60
+    assert bottom[2] > 200 and bottom[0] < 60
+
+def test_transparency_is_flattened_onto_white():
+    rgba = Image.new("RGBA", (20, 20), (0, 0, 0, 0))
+    rgba.paste((255, 0, 0, 255), (0, 0, 10, 20))
+    loaded = load_image(encoded(rgba, "PNG"))
+    assert loaded.mode == "RGB"
+    assert loaded.getpixel((15, 5)) == (255, 255, 255)
+    assert loaded.getpixel((5, 5)) == (255, 0, 0)
+    palette = Image.new("P", (10, 10), 0)
+    palette.putpalette([0, 0, 0] + [0, 200, 0] * 255)
+    palette.info["transparency"] = 0
+    assert load_image(encoded(palette, "PNG")).getpixel((0, 0)) == (255, 255, 255)
+
+def test_grey_and_webp_come_out_rgb():
+    assert load_image(encoded(Image.new("L", (10, 10), 128), "PNG")).getpixel((0, 0)) == (128, 128, 128)
+    assert load_image(encoded(Image.new("RGB", (10, 10), (10, 200, 30)), "WEBP", lossless=True)).mode == "RGB"
+
+def test_max_side_bounds_the_decoded_image():
+    photo = encoded(Image.new("RGB", (4000, 3000), (120, 80, 60)), "JPEG")
+    assert load_image(photo, max_side=1000).size == (1000, 750)
+    small = encoded(Image.new("RGB", (400, 300)), "JPEG")
+    assert load_image(small, max_side=1000).size == (400, 300)
+    assert ingest_side(640, "off") == 1024 and ingest_side(640, "auto") > 1024
+
+def test_zip_members_are_normalized(tmp_path):
+    path = tmp_path / "pen.zip"
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("b.png", encoded(Image.new("RGBA", (8, 8), (0, 0, 0, 0)), "PNG").getvalue())
+        zf.writestr("a.webp", encoded(Image.new("RGB", (8, 8)), "WEBP").getvalue())
+        zf.writestr("__MACOSX/._a.webp", b"junk")
+        zf.writestr("notes.txt", b"text")
+    items = list(iter_path_images([str(path)]))
+    assert [name for name, _ in items] == [f"{path}:a.webp", f"{path}:b.png"]
+    assert all(img.mode == "RGB" for _, img in items)
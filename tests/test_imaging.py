@@ -0,0 +1,28 @@
+import numpy as np
+from PIL import Image, ImageEnhance, ImageFilter, ImageOps
+
+from tuklas.imaging import make_derivatives
+
+def photo():
+    rng = np.random.default_rng(0)
+    rgb = (rng.random((300, 400, 3)) * 255).astype(np.uint8)
+    rgb[100:200, 100:300] = (200, 50, 50)
+    return Image.fromarray(rgb)
+
+def test_panels_match_the_pil_chain():
+    img = photo()
+    contrast, edge = make_derivatives(img, max_side=4000)
+    reference_contrast = ImageEnhance.Contrast(img).enhance(1.5)
+    reference_edge = ImageOps.invert(img.convert("L").filter(ImageFilter.FIND_EDGES))
+    assert np.abs(np.asarray(contrast, int) - np.asarray(reference_contrast, int)).max() <= 1
+    # PIL leaves the one-pixel border unfiltered; inside it the two differ only by greyscale rounding,
+    # which the 3x3 edge kernel amplifies by at most its weight of 8 per side.
+    diff = np.abs(np.asarray(edge, int) - np.asarray(reference_edge, int))[1:-1, 1:-1]
+    assert diff.max() <= 16 and diff.mean() < 1
+    assert edge.mode == "L" and contrast.mode == "RGB"
+
+def test_panels_are_capped_at_the_largest_displayed_size():
+    contrast, edge = make_derivatives(Image.new("RGB", (4000, 3000)))
+    assert contrast.size == edge.size == (1024, 768)
+    small = Image.new("RGB", (400, 300))
+    assert make_derivatives(small)[0].size == (400, 300)
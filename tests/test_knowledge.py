@@ -0,0 +1,50 @@
+import json
+import warnings
+
+import pytest
+
+from tuklas.knowledge import KnowledgeIndex, knowledge_index, load_knowledge, medical_data
+
+ENTRY = {"severity": "HIGH (test)", "cause": "c", "harm": "h", "materials": "m", "prevention": "p", "steps": "s"}
+
+def write_kb(tmp_path, data):
+    path = tmp_path / "kb.json"
+    path.write_text(json.dumps(data))
+    return str(path)
+
+def test_valid_file_loads(tmp_path):
+    data = {"Foot Lesion": dict(ENTRY, drug_name="D", dosage_rate=1.0, dosage_per_kg=10)}
+    assert load_knowledge(write_kb(tmp_path, data)) == data
+
+def test_missing_protocol_fields_are_rejected(tmp_path):
+    entry = {k: v for k, v in ENTRY.items() if k not in ("harm", "steps")}
+    with pytest.raises(ValueError, match="'Foot Lesion'.*missing: harm, steps"):
+        load_knowledge(write_kb(tmp_path, {"Foot Lesion": entry}))
+
+def test_partial_drug_records_are_rejected(tmp_path):
+    with pytest.raises(ValueError, match="needs all of: drug_name, dosage_rate, dosage_per_kg"):
+        load_knowledge(write_kb(tmp_path, {"Foot Lesion": dict(ENTRY, drug_name="D")}))
+
+def test_index_resolves_each_class_once():
+    kb = {"Erysipelas": dict(ENTRY, severity="CRITICAL (x)", drug_name="Penicillin", dosage_rate=1, dosage_per_kg=1),
+          "Healthy": dict(ENTRY, severity="OPTIMAL")}
+    index = KnowledgeIndex({0: "Healthy", 2: "Diamond-shaped Plaques (Erysipelas)", 3: "Tail Bite"}, kb)
+    # Exact match, then substring match either way; unknown classes stay unmapped and rank as OPTIMAL.
+    assert index.keys == {0: "Healthy", 2: "Erysipelas", 3: None}
+    assert index.info(2) is kb["Erysipelas"] and index.info(3) is None
+    assert list(index.drugs) == [2]
+    assert index.severity.tolist() == [0, 0, 3, 0]
+    assert index.unmapped == ["Tail Bite"]
+
+def test_unmapped_classes_warn_once_per_model():
+    with pytest.warns(UserWarning, match="No knowledge base entry for model classes: Ear Necrosis"):
+        knowledge_index({0: "Healthy", 1: "Ear Necrosis"})
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        # Same class map again: the cached index, no second warning.
+        knowledge_index({1: "Ear Necrosis", 0: "Healthy"})
+        assert knowledge_index({0: "Healthy", 1: "Erysipelas"}).unmapped == []
+
+def test_bundled_knowledge_base_is_valid():
+    assert {"Healthy"} <= set(medical_data)
+    assert all(k in entry for entry in medical_data.values() for k in ENTRY)
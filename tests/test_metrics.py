@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from tuklas.metrics import MetricsRegistry, StageTimer, stage
+
+def timer(**stages):
+    t = StageTimer()
+    for name, seconds in stages.items():
+        t.stages[name.replace("_", ".")] = seconds
+    return t
+
+def test_sub_stages_are_not_counted_twice():
+    t = timer(predict=0.2, pdf=0.1, pdf_qr=0.05)
+    assert t.total == pytest.approx(0.3)
+    assert [r["Stage"] for r in t.rows()] == ["predict", "pdf", "pdf.qr"]
+    assert t.rows()[0]["Share (%)"] == 66.7
+
+def test_stage_accumulates_and_tolerates_no_timer():
+    t = StageTimer()
+    for _ in range(2):
+        with t.stage("decode"):
+            pass
+    assert list(t.stages) == ["decode"] and t.stages["decode"] >= 0
+    with stage(None, "decode"):
+        pass
+
+def test_registry_keeps_a_rolling_window():
+    registry = MetricsRegistry(window=10)
+    for ms in range(1, 21):
+        registry.record(timer(predict=ms / 1000))
+    s = registry.snapshot()["stages"]["scan.predict"]
+    # All 20 are counted, but quantiles only see the last 10 (11..20 ms).
+    assert s["count"] == 20 and s["sum_s"] == 0.21
+    assert s["max_ms"] == 20.0 and s["p50_ms"] == 15.5
+    assert registry.snapshot()["stages"]["scan.total"]["count"] == 20
+
+def test_prometheus_and_files(tmp_path):
+    registry = MetricsRegistry()
+    registry.record(timer(predict=0.25), kind="api")
+    text = registry.to_prometheus()
+    assert 'tuklas_stage_seconds{kind="api",stage="predict",quantile="0.5"} 0.250000' in text
+    assert 'tuklas_stage_seconds_count{kind="api",stage="predict"} 1' in text
+    registry.write(str(tmp_path))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["tuklas_metrics.json", "tuklas_metrics.prom"]
+    assert json.loads((tmp_path / "tuklas_metrics.json").read_text())["stages"]["api.predict"]["count"] == 1
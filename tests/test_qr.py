@@ -0,0 +1,23 @@
+import cv2
+import numpy as np
+import pytest
+
+from tuklas.qr import MAX_VERSION, _data_codewords, qr_image, qr_matrix
+
+def longest_payload(ver, ecl):
+    # Byte mode: 4 mode bits and an 8-bit (16-bit from version 10) length field precede the data.
+    count_bits = 8 if ver <= 9 else 16
+    length = (_data_codewords(ver, ecl) * 8 - 4 - count_bits) // 8
+    return ("https://tuklas.local/verify/TK-" + "0123456789ABCDEFGHJKMNPQRSTVWXYZ" * 8)[:length]
+
+@pytest.mark.parametrize("ecl", ["L", "M"])
+@pytest.mark.parametrize("ver", range(1, MAX_VERSION + 1))
+def test_round_trip_decodes_at_every_version(ver, ecl):
+    text = longest_payload(ver, ecl)
+    assert (len(qr_matrix(text, ecl)) - 17) // 4 == ver
+    decoded, _, _ = cv2.QRCodeDetector().detectAndDecode(np.asarray(qr_image(text, scale=8, ecl=ecl)))
+    assert decoded == text
+
+def test_payload_past_the_largest_version_is_rejected():
+    with pytest.raises(ValueError):
+        qr_matrix(longest_payload(MAX_VERSION, "M") + "X")
@@ -0,0 +1,26 @@
+import os
+
+from PIL import Image
+
+from tuklas import report
+from tuklas.knowledge import medical_data
+from tuklas.report import PDF_IMAGE_PX, create_pdf, jpeg_image_info
+
+def test_panels_are_encoded_at_print_size():
+    info = jpeg_image_info(Image.new("RGB", (4000, 3000), (200, 120, 90)))
+    assert info["f"] == "DCTDecode" and info["data"][:2] == b"\xff\xd8"
+    assert (info["w"], info["h"]) == (516, 387)
+    assert info["w"] <= PDF_IMAGE_PX[0] and info["h"] <= PDF_IMAGE_PX[1]
+    gray = jpeg_image_info(Image.new("L", (100, 80)))
+    assert gray["cs"] == "DeviceGray" and (gray["w"], gray["h"]) == (100, 80)
+
+def test_report_is_built_without_touching_the_filesystem(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(report, "get_qr_code", lambda data: None)
+    photo = Image.new("RGB", (4000, 3000), (200, 120, 90))
+    pdf = create_pdf([photo] * 4, "Healthy", 92.5, medical_data["Healthy"])
+    assert pdf.startswith(b"%PDF") and pdf.rstrip().endswith(b"%%EOF")
+    # Four downsized JPEG panels, not four 12 MP originals.
+    assert pdf.count(b"/DCTDecode") == 4
+    assert len(pdf) < 500_000
+    assert os.listdir(tmp_path) == []
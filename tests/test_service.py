@@ -0,0 +1,57 @@
+import threading
+import time
+
+import pytest
+from PIL import Image
+
+from tuklas.backends import LatencyStats
+from tuklas.core import Detections
+from tuklas.service import InferenceService, QueueFull
+
+class GatedModel:
+    # Returns boxes at 0.1 / 0.5 / 0.9 for every image, and holds each call until `gate` is set.
+    name = "fake"
+    names = {0: "lesion"}
+
+    def __init__(self):
+        self.latency = LatencyStats()
+        self.gate = threading.Event()
+        self.calls = []
+
+    def predict_detections(self, images, conf):
+        self.calls.append((len(images), conf))
+        self.gate.wait(5)
+        return [Detections([[0, 0, 10, 10]] * 3, [0.1, 0.5, 0.9], [0, 0, 0]) for _ in images]
+
+def wait_for(predicate, timeout=5):
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        assert time.perf_counter() < deadline
+        time.sleep(0.005)
+
+def test_one_batch_filters_each_ticket_at_its_own_threshold():
+    model = GatedModel()
+    service = InferenceService(model, max_batch=8, batch_wait_ms=200)
+    img = Image.new("RGB", (32, 32))
+    loose = service.submit([img], 0.3)
+    strict = service.submit([img, img], 0.8)
+    model.gate.set()
+    assert [d.conf.tolist() for d in loose.wait(5)] == [pytest.approx([0.5, 0.9])]
+    assert [d.conf.tolist() for d in strict.wait(5)] == [pytest.approx([0.9])] * 2
+    # Both tickets shared one model call at the looser threshold.
+    assert model.calls == [(3, 0.3)]
+    stats = service.stats()
+    assert stats["batches"] == 1 and stats["images"] == 3 and stats["queue_depth"] == 0
+
+def test_full_queue_rejects_new_tickets():
+    model = GatedModel()
+    service = InferenceService(model, max_queue=1, max_batch=1, batch_wait_ms=0)
+    img = Image.new("RGB", (32, 32))
+    running = service.submit([img], 0.5)
+    wait_for(lambda: running.position() == 0)
+    waiting = service.submit([img], 0.5)
+    assert waiting.position() == 1
+    with pytest.raises(QueueFull):
+        service.submit([img], 0.5)
+    model.gate.set()
+    assert len(running.wait(5)) == len(waiting.wait(5)) == 1
@@ -0,0 +1,82 @@
+import json
+import random
+import sqlite3
+
+import pytest
+
+from tuklas.store import CONFIDENCE_BUCKETS, NEGATIVE, CaseStore
+
+CLASSES = ["Erysipelas", "Sarcoptic Mange", "Greasy Pig Disease"]
+
+def random_records(n, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for _ in range(n):
+        detections = [{"class": rng.choice(CLASSES), "confidence": round(rng.uniform(0.3, 1.0), 4),
+                       "box": [0, 0, 10, 10]} for _ in range(rng.choice([0, 0, 1, 2, 4]))]
+        records.append(dict(image_hash=f"{rng.getrandbits(64):016x}", detections=detections,
+                            diagnosis=detections[0]["class"] if detections else None,
+                            confidence=100 * detections[0]["confidence"] if detections else 0.0,
+                            farm=rng.choice(["F1", "F2"]), pen=rng.choice(["", "P1", "P2"]),
+                            created_at=f"2026-03-{rng.randint(1, 9):02d}T{rng.randint(0, 23):02d}:00:00"))
+    return records
+
+def recomputed(path):
+    # Rollups rebuilt from the cases table, the slow way the dashboard avoids.
+    conn = sqlite3.connect(path)
+    scans, classes, buckets = {}, {}, {}
+    for created_at, farm, pen, detections in conn.execute("SELECT created_at, farm, pen, detections FROM cases"):
+        key = (created_at[:10], farm, pen)
+        detections = json.loads(detections)
+        s = scans.setdefault(key, [0, 0])
+        s[0] += 1
+        s[1] += bool(detections)
+        for name in {d["class"] for d in detections}:
+            confs = [d["confidence"] for d in detections if d["class"] == name]
+            c = classes.setdefault(key + (name,), [0, 0, 0.0, 0.0])
+            c[0] += 1
+            c[1] += len(confs)
+            c[2] += sum(confs)
+            c[3] = max(c[3], max(confs))
+            for conf in confs:
+                b = key + (name, min(int(conf * CONFIDENCE_BUCKETS), CONFIDENCE_BUCKETS - 1))
+                buckets[b] = buckets.get(b, 0) + 1
+    conn.close()
+    return scans, classes, buckets
+
+def stored_rollups(path):
+    conn = sqlite3.connect(path)
+    scans = {r[:3]: list(r[3:]) for r in conn.execute("SELECT * FROM daily_scans")}
+    classes = {r[:4]: list(r[4:]) for r in conn.execute("SELECT * FROM daily_class")}
+    buckets = {r[:5]: r[5] for r in conn.execute("SELECT * FROM daily_confidence")}
+    conn.close()
+    return scans, classes, buckets
+
+def assert_rollups_consistent(path):
+    (scans, classes, buckets), (r_scans, r_classes, r_buckets) = stored_rollups(path), recomputed(path)
+    assert scans == r_scans
+    assert buckets == r_buckets
+    assert classes.keys() == r_classes.keys()
+    for key, values in classes.items():
+        assert values == pytest.approx(r_classes[key])
+
+def test_rollups_match_the_cases_table(tmp_path):
+    path = str(tmp_path / "cases.db")
+    store = CaseStore(path)
+    records = random_records(300)
+    ids = store.add_cases(records[:200])
+    ids += [store.add_case(**r) for r in records[200:]]
+    store.close()
+    assert len(set(ids)) == 300
+    assert ids[0] == "TK-" + records[0]["created_at"][:10].replace("-", "") + "-00001"
+    assert_rollups_consistent(path)
+
+def test_dashboard_totals_come_from_rollups(tmp_path):
+    store = CaseStore(str(tmp_path / "cases.db"))
+    records = random_records(100, seed=1)
+    store.add_cases(records)
+    totals = store.herd_totals("2026-03-01", farm="F1")
+    f1 = [r for r in records if r["farm"] == "F1"]
+    assert totals == {"scans": len(f1), "positive": sum(1 for r in f1 if r["detections"])}
+    assert store.count(farm="F1") == len(f1)
+    assert store.count(diagnosis=NEGATIVE) == sum(1 for r in records if not r["detections"])
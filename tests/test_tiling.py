@@ -0,0 +1,25 @@
+import numpy as np
+
+from tuklas.core import Detections
+from tuklas.tiling import merge_detections
+
+def test_box_split_across_two_tiles_merges_into_one():
+    # A lesion at x 400-900 seen by two overlapping tiles (at x 0 and 512): each sees only its own part.
+    left = Detections([[400, 100, 640, 200]], [0.8], [0])
+    right = Detections([[0, 100, 388, 200]], [0.7], [0])
+    merged = merge_detections([left, right], [(0, 0), (512, 0)])
+    assert len(merged) == 1
+    np.testing.assert_allclose(merged.xyxy, [[400, 100, 900, 200]])
+    np.testing.assert_allclose(merged.conf, [0.8])
+
+def test_fragment_inside_a_whole_box_is_dropped_and_other_classes_kept():
+    tile = Detections([[600, 100, 640, 200], [600, 100, 640, 200]], [0.6, 0.5], [0, 1])
+    whole = Detections([[600, 100, 700, 200]], [0.9], [0])
+    merged = merge_detections([tile, whole], [(0, 0), (0, 0)])
+    order = np.argsort(merged.cls)
+    np.testing.assert_allclose(merged.xyxy[order], [[600, 100, 700, 200], [600, 100, 640, 200]])
+    assert merged.cls[order].tolist() == [0, 1]
+
+def test_no_detections():
+    empty = Detections(np.zeros((0, 4)), [], [])
+    assert len(merge_detections([empty, empty], [(0, 0), (512, 0)])) == 0
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from tuklas.backends import LatencyStats, timed
+from tuklas.core import Detections
+from tuklas.tta import VIEWS, TTAEnsemble, unmap_boxes, weighted_box_fusion
+
+class RawBackend:
+    # A bare backend, no InferenceService in front: one box per view, always in the same place.
+    name = "fake"
+    names = {0: "lesion"}
+
+    def __init__(self):
+        self.latency = LatencyStats()
+
+    @timed
+    def predict_detections(self, images, conf):
+        return [Detections([[10, 10, 30, 30]], [0.9], [0]) for _ in images]
+
+def one_box(xyxy, score, cls=0):
+    return Detections([xyxy], [score], [cls])
+
+def test_box_every_run_found_has_full_agreement():
+    runs = [one_box([10, 10, 50, 50], 0.9), one_box([12, 10, 52, 50], 0.6), one_box([10, 12, 50, 52], 0.6)]
+    fused, agreement = weighted_box_fusion(runs)
+    assert len(fused) == 1
+    assert agreement.tolist() == [1.0]
+    assert fused.conf[0] == pytest.approx(0.7)
+    # Score-weighted: the 0.9 box pulls the average towards itself.
+    assert fused.xyxy[0] == pytest.approx([(10 * 0.9 + 12 * 0.6 + 10 * 0.6) / 2.1, (10 * 0.9 + 10 * 0.6 + 12 * 0.6) / 2.1,
+                                           (50 * 0.9 + 52 * 0.6 + 50 * 0.6) / 2.1, (50 * 0.9 + 50 * 0.6 + 52 * 0.6) / 2.1])
+
+def test_box_one_run_in_three_found_is_scaled_down():
+    empty = Detections(np.zeros((0, 4)), [], [])
+    runs = [one_box([10, 10, 50, 50], 0.9), empty, empty]
+    fused, agreement = weighted_box_fusion(runs)
+    assert agreement.tolist() == [pytest.approx(1 / 3)]
+    assert fused.conf[0] == pytest.approx(0.3)
+
+def test_classes_and_disjoint_boxes_are_not_fused():
+    runs = [Detections([[10, 10, 50, 50], [100, 100, 140, 140]], [0.8, 0.8], [0, 0]), one_box([10, 10, 50, 50], 0.8, 1)]
+    fused, agreement = weighted_box_fusion(runs)
+    assert len(fused) == 3
+    assert sorted(agreement.tolist()) == [0.5, 0.5, 0.5]
+
+@pytest.mark.parametrize("view", VIEWS, ids=[v[0] for v in VIEWS])
+def test_unmap_inverts_each_view(view):
+    _, scale, hflip, vflip = view
+    width, height = 640, 480
+    x1, y1, x2, y2 = 100.0, 50.0, 220.0, 130.0
+    # Forward: flip first, then shrink onto the top-left of the canvas, as make_view does.
+    if hflip:
+        x1, x2 = width - x2, width - x1
+    if vflip:
+        y1, y2 = height - y2, height - y1
+    seen = np.array([[x1, y1, x2, y2]]) * scale
+    assert unmap_boxes(seen, (width, height), scale, hflip, vflip)[0] == pytest.approx([100, 50, 220, 130])
+
+def test_plan_drops_views_to_fit_the_budget():
+    ensemble = TTAEnsemble([RawBackend()], budget_ms=250)
+    ensemble.view_ms = [100.0]
+    assert ensemble.plan(250) == [(0, 0), (0, 1)]
+    # The original view always runs, however tight the budget.
+    assert ensemble.plan(0) == [(0, 0)]
+    assert len(ensemble.plan(float("inf"))) == len(VIEWS)
+
+def test_raw_backend_accepts_the_queue_hook():
+    ensemble = TTAEnsemble([RawBackend()], budget_ms=float("inf"))
+    dets, tta = ensemble.predict(Image.new("RGB", (64, 64)), 0.3, on_wait=lambda ticket: None)
+    assert tta["runs"] == len(VIEWS)
+    assert 0.0 <= tta["agreement"] <= 1.0
@@ -0,0 +1,93 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from tuklas import video
+from tuklas.core import Detections, ranking_rows, summarize
+from tuklas.video import StreamAggregate, is_live_source, scan_stream, video_case_record
+
+NAMES = {0: "Healthy", 1: "Diamond-shaped Plaques (Erysipelas)"}
+
+class FakeModel:
+    names = NAMES
+
+def boxes(*found):
+    # (class, confidence) pairs, each as a small box.
+    return Detections([[0, 0, 10, 10]] * len(found), [c for _, c in found], [k for k, _ in found])
+
+@pytest.fixture
+def clip(tmp_path):
+    path = str(tmp_path / "pen.mp4")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), 30.0, (64, 48))
+    for i in range(48):
+        writer.write(np.full((48, 64, 3), i * 5, dtype=np.uint8))
+    writer.release()
+    return path
+
+def test_aggregate_keeps_running_totals_and_the_best_frame():
+    agg = StreamAggregate(NAMES)
+    agg.add(0, "f0", boxes())
+    agg.add(3, "f3", boxes((1, 0.6), (0, 0.3)))
+    agg.add(6, "f6", boxes((1, 0.8), (1, 0.7)))
+    summary = agg.summary()
+    assert (summary["frames_scanned"], summary["frames_positive"], summary["count"]) == (3, 2, 4)
+    assert summary["classes"] == ["Diamond-shaped Plaques (Erysipelas)", "Healthy"]
+    # Erysipelas' own mean, not diluted by the 0.3 Healthy box.
+    assert summary["confidence"] == pytest.approx(70.0)
+    assert agg.best_frame_index == 6 and agg.best_frame[0] == "f6"
+    top, healthy = summary["ranking"]
+    assert (top["count"], top["frames"], top["severity"]) == (3, 2, "CRITICAL")
+    assert top["mean_confidence"] == pytest.approx(70.0) and top["max_confidence"] == pytest.approx(80.0)
+    assert healthy["frames"] == 1
+
+def test_video_ranking_shares_the_still_photo_schema():
+    # One frame's aggregate ranks exactly like that frame scanned as a photo, plus the frame count.
+    dets = boxes((0, 0.9), (1, 0.4), (1, 0.6))
+    agg = StreamAggregate(NAMES)
+    agg.add(0, "f0", dets)
+    still = summarize(dets, NAMES)
+    ranking = agg.summary()["ranking"]
+    assert [{k: v for k, v in r.items() if k != "frames"} for r in ranking] == still["ranking"]
+    assert agg.summary()["confidence"] == still["confidence"]
+    assert [row["Frames"] for row in ranking_rows(ranking)] == [1, 1]
+    assert list(ranking_rows(ranking)[0])[:-1] == list(ranking_rows(still["ranking"])[0])
+
+def test_stored_video_case_pairs_the_diagnosis_with_its_own_confidence():
+    agg = StreamAggregate(NAMES)
+    agg.add(0, "f0", boxes((0, 0.9), (0, 0.9), (0, 0.9)))
+    agg.add(1, "f1", boxes((1, 0.5)))
+    record = video_case_record("hash", agg, farm="F1")
+    assert record["diagnosis"] == "Diamond-shaped Plaques (Erysipelas)"
+    assert record["confidence"] == pytest.approx(50.0)
+    # The strongest frame's boxes stand in for the clip.
+    assert [d["class"] for d in record["detections"]] == ["Healthy"] * 3
+    assert record["farm"] == "F1"
+    assert StreamAggregate(NAMES).summary()["confidence"] == 0.0
+
+def test_all_frames_mode_scans_every_frame(clip, monkeypatch):
+    monkeypatch.setattr(video, "predict", lambda model, frames, conf: [boxes() for _ in frames])
+    _, summary = scan_stream(FakeModel(), clip, 0.4, batch_size=4, realtime=False)
+    assert summary["frames_read"] == summary["frames_scanned"] == 48
+    assert summary["stride"] == 1 and summary["source_fps"] == 30.0
+
+def test_realtime_stride_grows_when_the_model_is_slower_than_the_source(clip, monkeypatch):
+    def slow_predict(model, frames, conf):
+        # 20 frames/s against a 30 fps source.
+        time.sleep(0.05 * len(frames))
+        return [boxes((1, 0.9)) for _ in frames]
+    monkeypatch.setattr(video, "predict", slow_predict)
+    agg, summary = scan_stream(FakeModel(), clip, 0.4, batch_size=4)
+    assert summary["stride"] >= 2
+    assert summary["frames_read"] == 48 and summary["frames_scanned"] < 48
+    assert summary["frames_positive"] == summary["frames_scanned"]
+
+def test_max_frames_stops_early(clip, monkeypatch):
+    monkeypatch.setattr(video, "predict", lambda model, frames, conf: [boxes() for _ in frames])
+    _, summary = scan_stream(FakeModel(), clip, 0.4, batch_size=4, realtime=False, max_frames=10)
+    assert summary["frames_scanned"] == 10
+
+def test_live_sources():
+    assert is_live_source("0") and is_live_source("rtsp://cam/pen3")
+    assert not is_live_source("pen.mp4")
@@ -0,0 +1,3 @@
+# Headless inference core for TUKLAS. Importing this package never pulls in
+# streamlit, streamlit_lottie or fpdf; those stay inside app.py / tuklas.report.
+__version__ = "0.1.0"
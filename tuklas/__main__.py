@@ -0,0 +1,5 @@
+from tuklas.cli import main
+
+# Guarded so worker processes started with the "spawn" method can import this module without re-running the CLI.
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,369 @@
+import asyncio
+import io
+import json
+import re
+import signal
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from tuklas import core
+from tuklas.cache import ResultCache, bytes_hash, file_hash
+from tuklas.config import load_config
+from tuklas.images import IMAGE_EXTENSIONS, ingest_side, iter_batch_images, load_image
+from tuklas.knowledge import knowledge_index
+from tuklas.metrics import REGISTRY, StageTimer
+from tuklas.service import InferenceService, QueueFull
+from tuklas.tiling import needs_tiling
+
+# Local HTTP API for farm management systems and networked scanners; stdlib asyncio only.
+#   GET  /health                 model, queue and store status
+#   GET  /metrics                Prometheus text (same registry as the app's metrics files)
+#   POST /scan                   multipart "image" (+ conf, tiling, farm, pen) -> JSON detections and ranking
+#   POST /batch-scan             multipart images and/or ZIPs (+ conf, tiling) -> JSON per image
+#   POST /report                 as /scan, but returns the PDF lab report (X-Case-Id header when stored)
+#   GET  /cases/<id>             stored case as JSON
+#   GET  /cases/<id>/report      stored PDF
+
+MAX_BODY = 100 * 1024 * 1024
+MAX_HEADERS = 100
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+# --- 1. HTTP/1.1 PARSING ---
+class Request:
+    def __init__(self, method, target, headers, body):
+        url = urllib.parse.urlsplit(target)
+        self.method = method
+        self.path = url.path.rstrip("/") or "/"
+        self.query = dict(urllib.parse.parse_qsl(url.query))
+        self.headers = headers
+        self.body = body
+        self.keep_alive = headers.get("connection", "").lower() != "close"
+
+async def read_line(reader, status, message):
+    try:
+        return await reader.readline()
+    except ValueError:
+        # StreamReader raises this once a line outgrows its buffer limit; the rest of the line is never read.
+        raise HTTPError(status, message)
+
+async def read_request(reader):
+    line = await read_line(reader, 414, "Request line too long")
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(400, "Malformed request line")
+    headers = {}
+    while True:
+        line = await read_line(reader, 431, "Header line too long")
+        if line in (b"\r\n", b"\n", b""):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise HTTPError(431, "Too many headers")
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise HTTPError(411, "Send a Content-Length; chunked uploads are not supported")
+    try:
+        length = int(headers.get("content-length") or 0)
+        if length < 0:
+            raise ValueError(length)
+    except ValueError:
+        raise HTTPError(400, "Malformed Content-Length")
+    if length > MAX_BODY:
+        raise HTTPError(413, f"Upload larger than {MAX_BODY // (1024 * 1024)} MB")
+    body = await reader.readexactly(length) if length else b""
+    return Request(method.upper(), target, headers, body)
+
+def parse_multipart(body, content_type):
+    # Returns (fields, files): plain form values by name, and uploads as (field, filename, bytes).
+    match = re.search(r'boundary="?([^";]+)"?', content_type or "")
+    if not content_type or not content_type.startswith("multipart/form-data") or not match:
+        raise HTTPError(415, "Expected a multipart/form-data upload")
+    fields, files = {}, []
+    for part in body.split(b"--" + match.group(1).encode("latin-1"))[1:]:
+        if part.startswith(b"--"):
+            break
+        head, _, data = part.partition(b"\r\n\r\n")
+        data = data[:-2] if data.endswith(b"\r\n") else data
+        disposition = next((h for h in head.decode("utf-8", "replace").split("\r\n")
+                            if h.lower().startswith("content-disposition")), "")
+        name = re.search(r'\bname="([^"]*)"', disposition)
+        filename = re.search(r'\bfilename="([^"]*)"', disposition)
+        if filename:
+            files.append((name.group(1) if name else "", filename.group(1), data))
+        elif name:
+            fields[name.group(1)] = data.decode("utf-8", "replace")
+    return fields, files
+
+def format_response(status, content_type, body, keep_alive=True, headers=None):
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}", f"Content-Type: {content_type}",
+             f"Content-Length: {len(body)}", f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    lines += [f"{k}: {v}" for k, v in (headers or {}).items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+def json_body(payload):
+    return json.dumps(payload).encode("utf-8")
+
+class Upload(io.BytesIO):
+    # What iter_batch_images expects from an uploaded file: a readable buffer with a .name.
+    def __init__(self, name, data):
+        super().__init__(data)
+        self.name = name
+
+# --- 2. SCAN API ---
+class ScanAPI:
+    # Parsing happens on the event loop; decoding, inference (through the shared micro-batching service) and PDF
+    # rendering run in worker pools, so a slow scan never stalls other clients.
+    def __init__(self, model, config=None, store=None, workers=None, model_path=core.MODEL_PATH, report_pool=None):
+        self.config = config or load_config()
+        self.service = InferenceService(model, max_queue=self.config["queue_size"],
+                                        max_batch=self.config["max_batch"], batch_wait_ms=self.config["batch_wait_ms"])
+        self.store = store
+        self.cache = ResultCache(max_items=256)
+        self.model_hash = file_hash(model_path)
+        self.model_id = f"{self.model_hash[:12]}/{model.name}"
+        # Threads mostly sit waiting on the inference queue, so allow enough to keep it full.
+        self.executor = ThreadPoolExecutor(max_workers=workers or self.config["queue_size"],
+                                           thread_name_prefix="tuklas-api")
+        self._report_pool = report_pool
+        self.routes = {
+            ("GET", "/health"): self.health,
+            ("GET", "/metrics"): self.metrics,
+            ("POST", "/scan"): self.scan,
+            ("POST", "/batch-scan"): self.batch_scan,
+            ("POST", "/report"): self.report,
+        }
+
+    @property
+    def report_pool(self):
+        # Report workers are spawned on the first /report, not at server start.
+        if self._report_pool is None:
+            from tuklas.batch_report import make_pool
+            self._report_pool = make_pool(self.config["report_workers"] or None)
+        return self._report_pool
+
+    def options(self, request, fields):
+        params = {**request.query, **fields}
+        try:
+            conf = float(params.get("conf", 0.40))
+        except ValueError:
+            raise HTTPError(400, "conf must be a number")
+        tiling = params.get("tiling", self.config["tiling"])
+        if tiling not in ("auto", "on", "off"):
+            raise HTTPError(400, "tiling must be auto, on or off")
+        return conf, tiling, params.get("farm", ""), params.get("pen", "")
+
+    def run(self, fn, *args):
+        return asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    def scan_image(self, file_name, data, conf, tiling, farm="", pen=""):
+        timer = StageTimer()
+        names = self.service.names
+        with timer.stage("decode"):
+            img = load_image(io.BytesIO(data), ingest_side(self.config["imgsz"], tiling))
+        with timer.stage("predict"):
+            tiled = needs_tiling(img, self.config["imgsz"], tiling)
+            variant = f"{self.service.name}-{img.width}x{img.height}" + ("-tiled" if tiled else "")
+            image_hash = bytes_hash(data)
+            key = ResultCache.make_key(image_hash, self.model_hash, variant)
+            dets = core.predict_cached(self.service, self.cache, key, img, conf, tiling="on" if tiled else "off",
+                                       tile_size=self.config["imgsz"])
+        summary = core.summarize(dets, names, img.size)
+        top = summary["ranking"][0] if summary["ranking"] else None
+        result = {
+            "file": file_name,
+            "image_hash": image_hash,
+            "width": img.width,
+            "height": img.height,
+            "diagnosis": top["class"] if top else "No lesions",
+            "confidence": round(summary["confidence"], 2),
+            "count": summary["count"],
+            "ranking": summary["ranking"],
+            "detections": dets.to_list(names),
+            "protocol": knowledge_index(names).info(top["class_id"]) if top else None,
+            "case_id": None,
+        }
+        if self.store is not None:
+            with timer.stage("store"):
+                result["case_id"] = self.store.add_case(image_hash, result["detections"], result["diagnosis"],
+                                                        summary["confidence"], farm, pen, model=self.model_id)
+        REGISTRY.record(timer, kind="api")
+        return result, img, dets
+
+    def scan_batch(self, uploads, conf, tiling, farm="", pen=""):
+        timer = StageTimer()
+        names = self.service.names
+        results = []
+        images = iter_batch_images(uploads, ingest_side(self.config["imgsz"], tiling), with_hash=True)
+        batches = core.predict_batch(self.service, images, conf, self.config["max_batch"], tiling, self.config["imgsz"])
+        while True:
+            with timer.stage("predict"):
+                batch = next(batches, None)
+            if batch is None:
+                break
+            case_ids = [None] * len(batch)
+            if self.store is not None:
+                # One transaction per inference batch.
+                with timer.stage("store"):
+                    case_ids = self.store.add_cases([core.case_record(image_hash, dets, names, farm=farm, pen=pen,
+                                                                      model=self.model_id)
+                                                     for _, dets, image_hash in batch])
+            for (file_name, dets, _), case_id in zip(batch, case_ids):
+                row = core.summary_row(file_name, dets, names)
+                row["Case ID"] = case_id
+                row["Boxes"] = dets.to_list(names)
+                results.append(row)
+        REGISTRY.record(timer, kind="api_batch")
+        return results
+
+    async def health(self, request):
+        return 200, "application/json", json_body({
+            "status": "ok",
+            "backend": self.service.name,
+            "classes": len(self.service.names),
+            "unmapped_classes": knowledge_index(self.service.names).unmapped,
+            "queue": self.service.stats(),
+            "store": self.store is not None,
+        })
+
+    async def metrics(self, request):
+        return 200, "text/plain; version=0.0.4", REGISTRY.to_prometheus().encode("utf-8")
+
+    async def _single_upload(self, request):
+        # Up to MAX_BODY of multipart scanning, so it runs on the executor rather than stalling the event loop.
+        fields, files = await self.run(parse_multipart, request.body, request.headers.get("content-type"))
+        images = [f for f in files if f[1].lower().endswith(IMAGE_EXTENSIONS)]
+        if not images:
+            raise HTTPError(400, f"Upload one image ({', '.join(IMAGE_EXTENSIONS)}) in an 'image' field")
+        _, file_name, data = next((f for f in images if f[0] == "image"), images[0])
+        conf, tiling, farm, pen = self.options(request, fields)
+        return await self.run(self.scan_image, file_name, data, conf, tiling, farm, pen)
+
+    async def scan(self, request):
+        result, _, _ = await self._single_upload(request)
+        return 200, "application/json", json_body(result)
+
+    async def batch_scan(self, request):
+        fields, files = await self.run(parse_multipart, request.body, request.headers.get("content-type"))
+        uploads = [Upload(file_name, data) for _, file_name, data in files]
+        if not uploads:
+            raise HTTPError(400, "Upload one or more images or ZIP archives")
+        conf, tiling, farm, pen = self.options(request, fields)
+        results = await self.run(self.scan_batch, uploads, conf, tiling, farm, pen)
+        return 200, "application/json", json_body({
+            "images": len(results),
+            "with_lesions": sum(1 for r in results if r["Detections"]),
+            "results": results,
+        })
+
+    async def report(self, request):
+        from tuklas.batch_report import case_payload, render_single
+        result, img, dets = await self._single_upload(request)
+        # Downscaling and ranking are CPU work too, so the payload is built on the executor like the scan itself.
+        payload = await self.run(case_payload, result["file"], img, dets, self.service.names, result["case_id"])
+        timer = StageTimer()
+        with timer.stage("report"):
+            file_name, pdf = await asyncio.get_running_loop().run_in_executor(self.report_pool, render_single, payload)
+        REGISTRY.record(timer, kind="api_report")
+        headers = {"Content-Disposition": f'attachment; filename="{file_name}"'}
+        if result["case_id"]:
+            await self.run(self.store.attach_report, result["case_id"], pdf)
+            headers["X-Case-Id"] = result["case_id"]
+        return 200, "application/pdf", pdf, headers
+
+    async def case(self, request, case_id, want_report):
+        if self.store is None:
+            raise HTTPError(404, "No case store configured")
+        if want_report:
+            pdf = await self.run(self.store.get_report, case_id)
+            if pdf is None:
+                raise HTTPError(404, f"No report stored for case {case_id}")
+            return 200, "application/pdf", pdf
+        row = await self.run(self.store.get_case, case_id)
+        if row is None:
+            raise HTTPError(404, f"Unknown case {case_id}")
+        return 200, "application/json", json_body(row)
+
+    async def dispatch(self, request):
+        handler = self.routes.get((request.method, request.path))
+        if handler is not None:
+            return await handler(request)
+        match = re.fullmatch(r"/cases/([\w-]+)(/report)?", request.path)
+        if match and request.method == "GET":
+            return await self.case(request, match.group(1), bool(match.group(2)))
+        if any(path == request.path for _, path in self.routes):
+            raise HTTPError(405, f"{request.method} is not allowed on {request.path}")
+        raise HTTPError(404, f"No endpoint {request.path}")
+
+    async def handle(self, reader, writer):
+        # HTTP/1.1 keep-alive: one task per connection, requests answered in order.
+        try:
+            while True:
+                keep_alive = False
+                extra = None
+                try:
+                    request = await read_request(reader)
+                    if request is None:
+                        break
+                    keep_alive = request.keep_alive
+                    response = await self.dispatch(request)
+                    status, content_type, body = response[:3]
+                    extra = response[3] if len(response) > 3 else None
+                except HTTPError as e:
+                    status, content_type, body = e.status, "application/json", json_body({"error": str(e)})
+                except QueueFull as e:
+                    status, content_type, body = 503, "application/json", json_body({"error": str(e)})
+                    extra = {"Retry-After": "1"}
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as e:
+                    status, content_type, body = 500, "application/json", json_body({"error": f"{type(e).__name__}: {e}"})
+                writer.write(format_response(status, content_type, body, keep_alive, extra))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+# --- 3. SERVER ---
+def serve(host="127.0.0.1", port=8765, model_path=core.MODEL_PATH, backend=None, threads=None, workers=None):
+    config = load_config()
+    t = time.perf_counter()
+    model = core.load_model(model_path, backend=backend, threads=threads)
+    store = None
+    if config["store_path"]:
+        from tuklas.store import CaseStore
+        store = CaseStore(config["store_path"])
+    api = ScanAPI(model, config, store, workers, model_path)
+
+    async def main():
+        server = await asyncio.start_server(api.handle, host, port, limit=2 ** 20)
+        print(f"TUKLAS API ({model.name}) listening on http://{host}:{port} after {time.perf_counter() - t:.1f} s")
+        # SIGTERM (systemd, docker stop) ends the server the same way Ctrl+C does, so report workers are reaped.
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                asyncio.get_running_loop().add_signal_handler(sig, stop.set)
+            except NotImplementedError:
+                pass
+        async with server:
+            await stop.wait()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.executor.shutdown(wait=False, cancel_futures=True)
+        if api._report_pool is not None:
+            api._report_pool.shutdown(cancel_futures=True)
@@ -0,0 +1,54 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from tuklas.config import load_config
+
+# --- 1. LOTTIE ASSETS ---
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+LOTTIE_URLS = {
+    "microscope": "https://lottie.host/0a927e36-6923-424d-8686-2484f4791e84/9z4s3l4Y2C.json",
+    "scanning": "https://lottie.host/5a0c301c-6685-4841-8407-1e0078174f46/7Q1a54a72d.json",
+}
+ICON_PATH = os.path.join(ASSET_DIR, "microscope.svg")
+
+# Process-wide: Streamlit reruns the script on every widget change, but these
+# survive across reruns and sessions, so each URL is fetched at most once.
+_executor = ThreadPoolExecutor(max_workers=len(LOTTIE_URLS), thread_name_prefix="tuklas-assets")
+_remote = {}
+_bundled = {}
+
+def load_lottieurl(url, timeout=3):
+    try:
+        r = requests.get(url, timeout=timeout)
+        if r.status_code != 200:
+            return None
+        return r.json()
+    except (requests.RequestException, ValueError):
+        return None
+
+def load_bundled_lottie(name):
+    if name not in _bundled:
+        try:
+            with open(os.path.join(ASSET_DIR, f"lottie_{name}.json")) as f:
+                _bundled[name] = json.load(f)
+        except (OSError, ValueError):
+            _bundled[name] = None
+    return _bundled[name]
+
+def prefetch_lotties():
+    if load_config()["offline"]:
+        return
+    for name, url in LOTTIE_URLS.items():
+        if name not in _remote:
+            _remote[name] = _executor.submit(load_lottieurl, url)
+
+def get_lottie(name):
+    # Never blocks: the remote animation is used once its background fetch has
+    # finished, and the bundled copy is shown until then (or when offline).
+    future = _remote.get(name)
+    if future is not None and future.done() and future.result() is not None:
+        return future.result()
+    return load_bundled_lottie(name)
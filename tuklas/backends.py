@@ -0,0 +1,197 @@
+import ast
+import os
+import shutil
+import time
+
+import numpy as np
+
+from tuklas.boxes import batched_nms
+from tuklas.cache import file_hash
+
+# Every backend exposes .name, .names and .predict_detections(images, conf) -> list[Detections].
+# Images are PIL images (RGB) or ndarrays in OpenCV's BGR order, the same convention ultralytics uses.
+BACKENDS = ("pytorch", "onnx", "onnx-int8", "openvino")
+IOU_THRESHOLD = 0.7
+MAX_DET = 300
+
+class LatencyStats:
+    def __init__(self):
+        self.images = 0
+        self.total_s = 0.0
+        self.last_ms = 0.0
+
+    def record(self, elapsed_s, images):
+        self.images += images
+        self.total_s += elapsed_s
+        self.last_ms = 1000 * elapsed_s / max(images, 1)
+
+    @property
+    def mean_ms(self):
+        return 1000 * self.total_s / self.images if self.images else 0.0
+
+def timed(predict_fn):
+    # `on_wait` is InferenceService's queue-position hook; a bare backend has no queue, so it is accepted and ignored.
+    def wrapper(self, images, conf, on_wait=None):
+        t = time.perf_counter()
+        out = predict_fn(self, images, conf)
+        self.latency.record(time.perf_counter() - t, len(images))
+        return out
+    return wrapper
+
+# --- 1. ULTRALYTICS (PYTORCH / OPENVINO) ---
+class UltralyticsBackend:
+    def __init__(self, weights, name="pytorch", threads=0, imgsz=640):
+        from ultralytics import YOLO
+        if threads and name == "pytorch":
+            import torch
+            torch.set_num_threads(threads)
+        self.name = name
+        self.imgsz = imgsz
+        self.model = YOLO(weights, task="detect")
+        self.names = self.model.names
+        self.latency = LatencyStats()
+
+    @timed
+    def predict_detections(self, images, conf):
+        from tuklas.core import Detections
+        results = self.model.predict(images, conf=conf, iou=IOU_THRESHOLD, max_det=MAX_DET, imgsz=self.imgsz, verbose=False)
+        return [Detections.from_result(r) for r in results]
+
+# --- 2. ONNX RUNTIME ---
+def letterbox(rgb, size):
+    import cv2
+    h, w = rgb.shape[:2]
+    gain = min(size / h, size / w)
+    new_w, new_h = round(w * gain), round(h * gain)
+    dw, dh = (size - new_w) / 2, (size - new_h) / 2
+    top, left = round(dh - 0.1), round(dw - 0.1)
+    if (new_w, new_h) != (w, h):
+        rgb = cv2.resize(rgb, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    out = np.full((size, size, 3), 114, dtype=np.uint8)
+    out[top:top + new_h, left:left + new_w] = rgb
+    return out, gain, (left, top)
+
+def to_rgb_array(img):
+    if isinstance(img, np.ndarray):
+        return np.ascontiguousarray(img[..., ::-1])
+    return np.asarray(img.convert("RGB"))
+
+class OnnxBackend:
+    def __init__(self, onnx_path, name="onnx", threads=0):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        meta = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(meta["names"])
+        self.imgsz = ast.literal_eval(meta.get("imgsz", "[640, 640]"))[0]
+        self.input_name = self.session.get_inputs()[0].name
+        self.name = name
+        self.latency = LatencyStats()
+
+    @timed
+    def predict_detections(self, images, conf):
+        from tuklas.core import Detections
+        arrays = [to_rgb_array(img) for img in images]
+        boxed = [letterbox(a, self.imgsz) for a in arrays]
+        batch = np.stack([b[0] for b in boxed]).transpose(0, 3, 1, 2).astype(np.float32) / 255.0
+        # Detect head output: (batch, 4 + num_classes, anchors) with boxes as centre-x, centre-y, w, h.
+        preds = self.session.run(None, {self.input_name: batch})[0].transpose(0, 2, 1)
+        out = []
+        for pred, arr, (_, gain, (left, top)) in zip(preds, arrays, boxed):
+            scores = pred[:, 4:]
+            cls = scores.argmax(axis=1)
+            best = scores[np.arange(len(cls)), cls]
+            keep = best >= conf
+            xywh, best, cls = pred[keep, :4], best[keep], cls[keep]
+            xyxy = np.concatenate([xywh[:, :2] - xywh[:, 2:] / 2, xywh[:, :2] + xywh[:, 2:] / 2], axis=1)
+            idx = batched_nms(xyxy, best, cls, IOU_THRESHOLD)[:MAX_DET]
+            xyxy = (xyxy[idx] - [left, top, left, top]) / gain
+            h, w = arr.shape[:2]
+            xyxy = np.clip(xyxy, 0, [w, h, w, h])
+            out.append(Detections(xyxy, best[idx], cls[idx]))
+        return out
+
+# --- 3. EXPORT & ARTIFACT CACHE ---
+def artifact_path(model_path, suffix, imgsz=640):
+    # Exports sit next to best.pt, keyed by its content hash and input size, so retrained weights or a
+    # different pinned resolution never reuse a stale export.
+    stem = os.path.splitext(model_path)[0]
+    return f"{stem}.{file_hash(model_path)[:12]}.{imgsz}{suffix}"
+
+def export_onnx(model_path, imgsz=640):
+    target = artifact_path(model_path, ".onnx", imgsz)
+    if not os.path.exists(target):
+        from ultralytics import YOLO
+        exported = YOLO(model_path, task="detect").export(format="onnx", imgsz=imgsz, dynamic=True, simplify=False)
+        os.replace(exported, target)
+    return target
+
+def export_onnx_int8(model_path, imgsz=640):
+    target = artifact_path(model_path, ".int8.onnx", imgsz)
+    if not os.path.exists(target):
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(export_onnx(model_path, imgsz), target, weight_type=QuantType.QUInt8)
+    return target
+
+def export_openvino(model_path, imgsz=640):
+    target = artifact_path(model_path, "_openvino_model", imgsz)
+    if not os.path.exists(target):
+        from ultralytics import YOLO
+        exported = YOLO(model_path, task="detect").export(format="openvino", imgsz=imgsz, dynamic=False)
+        shutil.move(exported, target)
+    return target
+
+def load_backend(model_path, backend="pytorch", threads=0, imgsz=640):
+    if backend == "pytorch":
+        return UltralyticsBackend(model_path, "pytorch", threads, imgsz)
+    if backend == "onnx":
+        return OnnxBackend(export_onnx(model_path, imgsz), "onnx", threads)
+    if backend == "onnx-int8":
+        return OnnxBackend(export_onnx_int8(model_path, imgsz), "onnx-int8", threads)
+    if backend == "openvino":
+        return UltralyticsBackend(export_openvino(model_path, imgsz), "openvino", threads, imgsz)
+    raise ValueError(f"Unknown backend '{backend}'. Choose one of: {', '.join(BACKENDS)}")
+
+# --- 4. BACKEND COMPARISON ---
+def compare_backends(model_path, images, backends, conf=0.25, runs=3, threads=0, imgsz=640):
+    from tuklas.boxes import box_iou
+    reference = None
+    report = []
+    for name in backends:
+        t = time.perf_counter()
+        backend = load_backend(model_path, name, threads, imgsz)
+        load_s = time.perf_counter() - t
+        backend.predict_detections(images[:1], conf)
+        timings = []
+        for _ in range(runs):
+            t = time.perf_counter()
+            dets = backend.predict_detections(images, conf)
+            timings.append((time.perf_counter() - t) / len(images))
+        row = {"backend": name, "load_s": round(load_s, 2), "latency_ms": round(1000 * float(np.median(timings)), 1),
+               "boxes": int(sum(len(d) for d in dets))}
+        if reference is None:
+            reference = dets
+        else:
+            # Match each reference box to its best same-class box from this backend.
+            ious, conf_diffs, missed = [], [], 0
+            for ref, cur in zip(reference, dets):
+                if len(ref) == 0:
+                    continue
+                if len(cur) == 0:
+                    missed += len(ref)
+                    continue
+                iou = box_iou(ref.xyxy, cur.xyxy) * (ref.cls[:, None] == cur.cls[None, :])
+                best = iou.argmax(axis=1)
+                matched = iou[np.arange(len(ref)), best] >= 0.5
+                missed += int((~matched).sum())
+                ious.extend(iou[np.arange(len(ref)), best][matched].tolist())
+                conf_diffs.extend(np.abs(ref.conf[matched] - cur.conf[best[matched]]).tolist())
+            row.update({"min_iou": round(min(ious), 3) if ious else None,
+                        "max_conf_diff": round(max(conf_diffs), 4) if conf_diffs else None,
+                        "missed": missed})
+        report.append(row)
+    return report
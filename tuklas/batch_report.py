@@ -0,0 +1,182 @@
+import datetime
+import io
+import multiprocessing
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from PIL import Image
+
+from tuklas.core import Detections, plot_detections, summarize
+from tuklas.imaging import downscale, make_derivatives
+from tuklas.knowledge import knowledge_index
+from tuklas.report import PDF_IMAGE_PX, PDFReport, clean_text, jpeg_image_info, qr_image_info, render_case
+
+# --- 1. CASE PAYLOADS ---
+# Every panel is printed at 43x35 mm, so each photo is downsampled once, here, to the embed size and kept as a
+# high-quality JPEG (tens of KB rather than a ~600 KB RGB array): a scanned pen sits in the UI session as payloads
+# until its report is asked for, and the payload pickled across the process boundary stays small.
+PAYLOAD_JPEG_QUALITY = 95
+
+# `case_id` is the ID the case store issued; without one the report has no verify QR code to point anywhere.
+def case_payload(name, img, dets, names, case_id=None):
+    rgb = downscale(img, max(PDF_IMAGE_PX))
+    scale = rgb.shape[1] / img.size[0]
+    buf = io.BytesIO()
+    Image.fromarray(rgb).save(buf, format="JPEG", quality=PAYLOAD_JPEG_QUALITY)
+    summary = summarize(dets, names, img.size)
+    top = summary["ranking"][0] if summary["ranking"] else None
+    return {
+        "case_id": case_id,
+        "name": name,
+        "jpeg": buf.getvalue(),
+        "dets": (dets.xyxy * scale, dets.conf, dets.cls),
+        "names": dict(names),
+        "diagnosis": top["class"] if top else "No lesions",
+        "confidence": summary["confidence"],
+        "count": summary["count"],
+        "ranking": summary["ranking"],
+        "info": knowledge_index(names).info(top["class_id"]) if top else None,
+    }
+
+def prepare_case(payload, attach=False):
+    # Runs in a worker: all the per-case pixel work (plot, derivatives, JPEG, QR). With `attach`, a stored case's
+    # own one-case PDF is laid out here too, in parallel, rather than by the process building the batch report.
+    img = Image.open(io.BytesIO(payload["jpeg"])).convert("RGB")
+    annotated = Image.fromarray(plot_detections(img, Detections(*payload["dets"]), payload["names"]))
+    contrast, edge = make_derivatives(img, max(PDF_IMAGE_PX))
+    assets = {k: v for k, v in payload.items() if k not in ("jpeg", "dets", "names")}
+    assets["panels"] = [jpeg_image_info(im) for im in (img, annotated, contrast, edge)]
+    assets["qr"] = qr_image_info(payload["case_id"]) if payload["case_id"] else None
+    if attach and payload["case_id"]:
+        assets["report"] = _single_pdf(assets)
+    return assets
+
+def _new_pdf():
+    pdf = PDFReport()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    return pdf
+
+def report_name(payload, index=None):
+    stem = payload["case_id"] or re.sub(r"[^\w.-]+", "_", os.path.splitext(os.path.basename(payload["name"]))[0])
+    # Two uploads can share a file name and unstored cases have no ID, so batch entries carry their upload position.
+    return f"TUKLAS_Report_{stem}.pdf" if index is None else f"TUKLAS_Report_{index:03d}_{stem}.pdf"
+
+def _single_pdf(assets):
+    pdf = _new_pdf()
+    _render_assets(pdf, assets)
+    return pdf.output(dest='S').encode('latin-1')
+
+def render_single(payload):
+    return report_name(payload), _single_pdf(prepare_case(payload))
+
+def _render_assets(pdf, assets, key=""):
+    render_case(pdf, assets["panels"], assets["diagnosis"], assets["confidence"], assets["info"],
+                assets["case_id"] or "Not stored", assets["ranking"], assets["qr"], key)
+
+# --- 2. PROCESS POOL ---
+def make_pool(workers=None):
+    # "spawn" rather than fork: the Streamlit server is multi-threaded, and forking it can deadlock a child.
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+def _map(fn, payloads, pool, on_progress):
+    # In order, so pages follow upload order; progress is reported as each case finishes.
+    results = []
+    mapped = pool.map(fn, payloads, chunksize=max(1, len(payloads) // 32)) if pool else map(fn, payloads)
+    for result in mapped:
+        results.append(result)
+        if on_progress is not None:
+            on_progress(len(results), len(payloads))
+    return results
+
+# --- 3. CONSOLIDATED REPORT ---
+def render_cover(pdf, cases, title, subtitle=""):
+    pdf.add_page()
+    pdf.ln(2)
+    pdf.set_font("Arial", "B", 14)
+    pdf.cell(0, 8, clean_text(title), 0, 1, 'L')
+    pdf.set_font("Arial", "", 10)
+    pdf.cell(0, 6, clean_text(f"{subtitle}  Generated {datetime.datetime.now():%Y-%m-%d %H:%M}".strip()), 0, 1, 'L')
+    pdf.ln(2)
+    positives = sum(1 for c in cases if c["count"])
+    pdf.set_font("Arial", "B", 10)
+    pdf.set_fill_color(240, 240, 240)
+    pdf.cell(0, 7, "PEN SUMMARY", 1, 1, 'L', fill=True)
+    pdf.set_font("Arial", "", 10)
+    for label, value in (("Animals scanned:", len(cases)), ("With lesions:", positives),
+                         ("Clear:", len(cases) - positives)):
+        pdf.cell(45, 6, label, 1)
+        pdf.cell(50, 6, str(value), 1, 1)
+    pdf.ln(3)
+
+    totals = {}
+    for c in cases:
+        for r in c["ranking"]:
+            t = totals.setdefault(r["class"], {"severity": r["severity"], "animals": 0, "boxes": 0})
+            t["animals"] += 1
+            t["boxes"] += r["count"]
+    if totals:
+        pdf.set_font("Arial", "B", 10)
+        pdf.cell(0, 7, "FINDINGS BY CLASS", 1, 1, 'L', fill=True)
+        pdf.set_font("Arial", "B", 8)
+        for w, title in ((100, "Class"), (40, "Severity"), (25, "Animals"), (25, "Boxes")):
+            pdf.cell(w, 5, title, 1, 0, 'C')
+        pdf.ln()
+        pdf.set_font("Arial", "", 8)
+        for name, t in sorted(totals.items(), key=lambda kv: (-kv[1]["animals"], kv[0])):
+            pdf.cell(100, 5, clean_text(name), 1)
+            pdf.cell(40, 5, t["severity"], 1, 0, 'C')
+            pdf.cell(25, 5, str(t["animals"]), 1, 0, 'C')
+            pdf.cell(25, 5, str(t["boxes"]), 1, 1, 'C')
+        pdf.ln(3)
+
+    pdf.set_font("Arial", "B", 10)
+    pdf.cell(0, 7, "CASE INDEX", 1, 1, 'L', fill=True)
+    pdf.set_font("Arial", "B", 8)
+    widths = [12, 38, 60, 60, 20]
+    for w, title in zip(widths, ["Page", "Case ID", "File", "Diagnosis", "Conf."]):
+        pdf.cell(w, 5, title, 1, 0, 'C')
+    pdf.ln()
+    pdf.set_font("Arial", "", 8)
+    for c in cases:
+        values = [str(c["page"]), c["case_id"] or "-", clean_text(c["name"])[-36:], clean_text(c["diagnosis"])[:38],
+                  f"{c['confidence']:.1f}%" if c["count"] else "-"]
+        for w, value in zip(widths, values):
+            pdf.cell(w, 5, value, 1, 0, 'L')
+        pdf.ln()
+
+def build_batch_pdf(payloads, title="Pen Visit Report", subtitle="", pool=None, on_progress=None, store=None):
+    # With a case store, each stored case also gets its own one-case PDF attached, as a single scan's would.
+    cases = _map(partial(prepare_case, attach=store is not None), payloads, pool, on_progress)
+    reports = [(assets["case_id"], assets.pop("report")) for assets in cases if "report" in assets]
+    if reports:
+        store.attach_reports(reports)
+    # A case runs to a second page when its ranking table is long, so its first page is only known once the pages
+    # before it are laid out. The cover's index holds a placeholder per case (left-aligned in a fixed-width cell,
+    # so the cover's own layout does not depend on it) that is filled in once every case is on the page.
+    for i, assets in enumerate(cases):
+        assets["page"] = f"{{case{i}}}"
+    pdf = _new_pdf()
+    render_cover(pdf, cases, title, subtitle)
+    cover_pages = pdf.page
+    first_pages = {}
+    for i, assets in enumerate(cases):
+        first_pages[assets["page"]] = str(pdf.page + 1)
+        _render_assets(pdf, assets, key=f"c{i}")
+    placeholder = re.compile(r"\{case\d+\}")
+    for n in range(1, cover_pages + 1):
+        pdf.pages[n] = placeholder.sub(lambda m: first_pages[m.group()], pdf.pages[n])
+    return pdf.output(dest='S').encode('latin-1')
+
+def build_batch_zip(payloads, pool=None, on_progress=None, store=None):
+    rendered = _map(render_single, payloads, pool, on_progress)
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_STORED) as zf:
+        # PDFs are already compressed internally; storing them avoids a second, pointless deflate pass.
+        for i, (payload, (_, data)) in enumerate(zip(payloads, rendered), 1):
+            zf.writestr(report_name(payload, i), data)
+    if store is not None:
+        store.attach_reports([(p["case_id"], data) for p, (_, data) in zip(payloads, rendered) if p["case_id"]])
+    return buf.getvalue()
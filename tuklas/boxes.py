@@ -0,0 +1,39 @@
+import numpy as np
+
+# --- 1. BOX GEOMETRY ---
+def box_area(xyxy):
+    return np.clip(xyxy[:, 2] - xyxy[:, 0], 0, None) * np.clip(xyxy[:, 3] - xyxy[:, 1], 0, None)
+
+def box_iou(a, b):
+    # Pairwise IoU, shape (len(a), len(b)).
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(rb - lt, 0, None), axis=2)
+    return inter / (box_area(a)[:, None] + box_area(b)[None, :] - inter + 1e-9)
+
+def box_ios(a, b):
+    # Intersection over the smaller box: ~1 when a box clipped at a tile edge lies inside the full one.
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(rb - lt, 0, None), axis=2)
+    return inter / (np.minimum(box_area(a)[:, None], box_area(b)[None, :]) + 1e-9)
+
+# --- 2. NON-MAXIMUM SUPPRESSION ---
+def nms(xyxy, scores, iou_threshold, metric=box_iou):
+    order = np.argsort(-scores, kind="stable")
+    keep = []
+    while order.size:
+        i = order[0]
+        keep.append(i)
+        if order.size == 1:
+            break
+        ious = metric(xyxy[i:i + 1], xyxy[order[1:]])[0]
+        order = order[1:][ious <= iou_threshold]
+    return np.asarray(keep, dtype=np.int64)
+
+def batched_nms(xyxy, scores, classes, iou_threshold, metric=box_iou):
+    # Per-class NMS in one pass: shift each class into its own coordinate range so boxes never overlap across classes.
+    if len(scores) == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = classes.astype(np.float32)[:, None] * (float(xyxy.max()) + 1)
+    return nms(xyxy + offsets, scores, iou_threshold, metric)
@@ -0,0 +1,85 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from tuklas.core import Detections
+
+_file_hashes = {}
+
+def bytes_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+def file_hash(path):
+    # Memoized on (size, mtime) so a multi-MB best.pt is only hashed once per process.
+    st = os.stat(path)
+    key = (path, st.st_size, st.st_mtime_ns)
+    if key not in _file_hashes:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        _file_hashes[key] = h.hexdigest()
+    return _file_hashes[key]
+
+class ResultCache:
+    def __init__(self, max_items=256, disk_dir=None):
+        self.max_items = max_items
+        self.disk_dir = disk_dir
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._mem = OrderedDict()
+        self._lock = threading.Lock()
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(image_hash, model_hash, backend="pytorch"):
+        return f"{model_hash[:16]}-{backend}-{image_hash}"
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.npz")
+
+    def get(self, key):
+        with self._lock:
+            if key in self._mem:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return self._mem[key]
+        if self.disk_dir and os.path.exists(self._disk_path(key)):
+            try:
+                with np.load(self._disk_path(key)) as data:
+                    dets = Detections(data["xyxy"], data["conf"], data["cls"])
+            except (OSError, ValueError, KeyError):
+                dets = None
+            if dets is not None:
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                self._put_mem(key, dets)
+                return dets
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _put_mem(self, key, dets):
+        with self._lock:
+            self._mem[key] = dets
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.max_items:
+                self._mem.popitem(last=False)
+
+    def put(self, key, dets):
+        self._put_mem(key, dets)
+        if self.disk_dir:
+            tmp = self._disk_path(key) + ".tmp"
+            with open(tmp, "wb") as f:
+                np.savez(f, xyxy=dets.xyxy, conf=dets.conf, cls=dets.cls)
+            os.replace(tmp, self._disk_path(key))
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses, "size": len(self._mem)}
@@ -0,0 +1,361 @@
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+from tuklas import core
+from tuklas.config import load_config
+from tuklas.images import iter_path_images
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+def open_store(args, config):
+    if args.no_store or not config["store_path"]:
+        return None
+    from tuklas.store import CaseStore
+    return CaseStore(config["store_path"])
+
+def model_id(args, model):
+    from tuklas.cache import file_hash
+    return f"{file_hash(args.model)[:12]}/{model.name}"
+
+def cmd_scan(args):
+    t0 = time.perf_counter()
+    model = core.load_model(args.model, backend=args.backend, threads=args.threads)
+    load_s = time.perf_counter() - t0
+
+    records, rows, latencies = [], [], []
+    scan_start = time.perf_counter()
+    config = load_config()
+    store = open_store(args, config)
+    stored_model = model_id(args, model)
+    batches = core.predict_batch(model, iter_path_images(args.paths, with_hash=True), args.conf, args.batch_size,
+                                 args.tiling or config["tiling"], config["imgsz"])
+    while True:
+        t = time.perf_counter()
+        batch = next(batches, None)
+        if batch is None:
+            break
+        per_image = (time.perf_counter() - t) / len(batch)
+        case_ids = [None] * len(batch)
+        if store is not None:
+            # One transaction per inference batch.
+            case_ids = store.add_cases([core.case_record(image_hash, dets, model.names, farm=args.farm, pen=args.pen,
+                                                         model=stored_model)
+                                        for _, dets, image_hash in batch])
+        for (file_name, dets, _), case_id in zip(batch, case_ids):
+            latencies.append(per_image)
+            row = core.summary_row(file_name, dets, model.names)
+            if store is not None:
+                row["Case ID"] = case_id
+            rows.append(row)
+            record = dict(row)
+            record["Boxes"] = dets.to_list(model.names)
+            if len(dets) > 0:
+                record["Report"] = core.generate_smart_report(row["Diagnosis"], row["Detections"], row["Confidence (%)"])
+            records.append(record)
+    scan_s = time.perf_counter() - scan_start
+
+    timing = {
+        "cold_start_s": round(load_s, 3),
+        "images": len(records),
+        "scan_s": round(scan_s, 3),
+        "images_per_s": round(len(records) / scan_s, 2) if scan_s > 0 else 0.0,
+        "latency_ms_mean": round(1000 * sum(latencies) / len(latencies), 1) if latencies else 0.0,
+        "latency_ms_p50": round(1000 * _percentile(latencies, 50), 1),
+        "latency_ms_p95": round(1000 * _percentile(latencies, 95), 1),
+    }
+    payload = {"model": args.model, "backend": model.name, "conf": args.conf, "timing": timing, "results": records}
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(payload, f, indent=2)
+    if args.csv and rows:
+        with open(args.csv, "wb") as f:
+            f.write(core.rows_to_csv(rows))
+    if not args.json and not args.csv:
+        json.dump(payload, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    print(f"cold start {timing['cold_start_s']:.2f}s | {timing['images']} images in {timing['scan_s']:.2f}s "
+          f"({timing['images_per_s']:.1f} img/s) | latency p50 {timing['latency_ms_p50']:.0f}ms "
+          f"p95 {timing['latency_ms_p95']:.0f}ms", file=sys.stderr)
+    return 0
+
+def cmd_video(args):
+    from tuklas.video import is_live_source, scan_stream, source_hash, video_case_record
+
+    t0 = time.perf_counter()
+    model = core.load_model(args.model, backend=args.backend, threads=args.threads)
+    load_s = time.perf_counter() - t0
+
+    def report(agg, progress):
+        print(f"\rframes read {progress['frames_read']} | scanned {agg.frames_scanned} | stride {progress['stride']} "
+              f"| {progress['scan_fps']:.1f} scanned fps", end="", file=sys.stderr)
+
+    if is_live_source(args.source) and args.max_seconds is None and args.max_frames is None:
+        print("Live source: scanning until the stream ends (set --max-seconds to stop sooner)", file=sys.stderr)
+    agg, summary = scan_stream(model, args.source, args.conf, batch_size=args.batch_size,
+                             realtime=not args.all_frames, max_frames=args.max_frames,
+                             max_seconds=args.max_seconds, on_batch=report)
+    print(file=sys.stderr)
+    summary["cold_start_s"] = round(load_s, 3)
+    payload = {"model": args.model, "backend": model.name, "source": args.source, "conf": args.conf, "summary": summary}
+    store = open_store(args, load_config())
+    if store is not None:
+        payload["case_id"] = store.add_cases([video_case_record(source_hash(args.source), agg, farm=args.farm,
+                                                                pen=args.pen, model=model_id(args, model))])[0]
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(payload, f, indent=2)
+    else:
+        json.dump(payload, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    print(f"{summary['frames_scanned']}/{summary['frames_read']} frames scanned in {summary['elapsed_s']:.2f}s "
+          f"({summary['scan_fps']:.1f} fps, source {summary['source_fps']:.0f} fps) | "
+          f"{summary['count']} detections in {summary['frames_positive']} frames", file=sys.stderr)
+    return 0
+
+def cmd_backends(args):
+    from tuklas.backends import compare_backends
+
+    images = [img for _, img in iter_path_images(args.paths)][:args.max_images]
+    if not images:
+        print("No images found.", file=sys.stderr)
+        return 1
+    report = compare_backends(args.model, images, args.backends, conf=args.conf, runs=args.runs,
+                              threads=args.threads or 0)
+    json.dump(report, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    fastest = min(report, key=lambda r: r["latency_ms"])
+    print(f"fastest: {fastest['backend']} at {fastest['latency_ms']:.1f} ms/image "
+          f"(reference {report[0]['backend']} {report[0]['latency_ms']:.1f} ms/image)", file=sys.stderr)
+    return 0
+
+def cmd_serve(args):
+    from tuklas.api import serve
+    serve(args.host, args.port, args.model, backend=args.backend, threads=args.threads, workers=args.workers)
+    return 0
+
+LOOPBACK = ("localhost", "127.0.0.1", "::1")
+
+def block_network():
+    # Every non-loopback connection and DNS lookup fails the way it does on a farm without signal;
+    # the targets are recorded so the report can name whatever still tried to reach out.
+    attempts = []
+    real_connect, real_connect_ex, real_getaddrinfo = socket.socket.connect, socket.socket.connect_ex, socket.getaddrinfo
+
+    def remote(sock, address):
+        return sock.family in (socket.AF_INET, socket.AF_INET6) and address[0] not in LOOPBACK
+
+    def connect(sock, address):
+        if remote(sock, address):
+            attempts.append(f"{address[0]}:{address[1]}")
+            raise OSError(f"Network disabled by tuklas check --offline ({address[0]})")
+        return real_connect(sock, address)
+
+    def connect_ex(sock, address):
+        if remote(sock, address):
+            attempts.append(f"{address[0]}:{address[1]}")
+            return 101  # ENETUNREACH
+        return real_connect_ex(sock, address)
+
+    def getaddrinfo(host, *args, **kwargs):
+        if host not in LOOPBACK and host is not None:
+            attempts.append(str(host))
+            raise socket.gaierror(f"Network disabled by tuklas check --offline ({host})")
+        return real_getaddrinfo(host, *args, **kwargs)
+
+    socket.socket.connect, socket.socket.connect_ex, socket.getaddrinfo = connect, connect_ex, getaddrinfo
+    return attempts
+
+def check_image(config):
+    # A smooth synthetic photo at twice the model input, so decode-independent latency is still realistic.
+    import numpy as np
+    from PIL import Image
+    size = config["imgsz"] * 2
+    yy, xx = np.mgrid[0:size, 0:size]
+    rgb = np.stack([160 + 60 * np.sin(xx / 37), 120 + 40 * np.cos(yy / 23), 110 + 30 * np.sin((xx + yy) / 51)], -1)
+    return Image.fromarray(rgb.astype(np.uint8))
+
+def cmd_check(args):
+    from tuklas.assets import ICON_PATH, LOTTIE_URLS, ASSET_DIR
+    from tuklas.images import ingest_side
+
+    blocked = block_network() if args.offline else []
+    if args.offline:
+        os.environ["TUKLAS_OFFLINE"] = "true"
+    config = load_config()
+    checks, latency, state = [], {}, {}
+
+    def run(name, fn):
+        t = time.perf_counter()
+        try:
+            detail, ok = fn(), True
+        except Exception as e:
+            detail, ok = f"{type(e).__name__}: {e}", False
+        checks.append({"check": name, "ok": ok, "seconds": round(time.perf_counter() - t, 3), "detail": detail})
+        print(f"{'ok  ' if ok else 'FAIL'} {name}: {detail}", file=sys.stderr)
+        return ok
+
+    def assets():
+        needed = [ICON_PATH, config["knowledge_base"], args.model]
+        needed += [os.path.join(ASSET_DIR, f"lottie_{name}.json") for name in LOTTIE_URLS]
+        missing = [path for path in needed if not os.path.exists(path)]
+        if missing:
+            raise FileNotFoundError(", ".join(missing))
+        return f"{len(needed)} files present"
+
+    def model():
+        t = time.perf_counter()
+        state["model"] = core.load_model(args.model, backend=args.backend, threads=args.threads, warmup_runs=0)
+        latency["load_s"] = round(time.perf_counter() - t, 3)
+        runs = config["warmup_runs"] if args.warmup_runs is None else args.warmup_runs
+        t = time.perf_counter()
+        core.warm_up(state["model"], runs)
+        latency["warmup_runs"] = runs
+        latency["warmup_ms"] = round((time.perf_counter() - t) * 1000, 1)
+        return f"{state['model'].name} at {state['model'].imgsz} px, {config['threads'] or 'default'} threads"
+
+    def scan():
+        side = ingest_side(config["imgsz"], config["tiling"])
+        images = [img for _, img in iter_path_images(args.paths, side)] if args.paths else [check_image(config)]
+        if not images:
+            raise FileNotFoundError("no images found in " + ", ".join(args.paths))
+        samples = []
+        for i in range(args.runs + 1):
+            img = images[i % len(images)]
+            t = time.perf_counter()
+            dets = core.predict(state["model"], [img], args.conf)[0]
+            samples.append(time.perf_counter() - t)
+        state["image"], state["dets"] = images[0], dets
+        steady = samples[1:]
+        latency["first_scan_ms"] = round(samples[0] * 1000, 1)
+        latency["steady_p50_ms"] = round(_percentile(steady, 50) * 1000, 1)
+        latency["steady_p95_ms"] = round(_percentile(steady, 95) * 1000, 1)
+        return (f"first scan {latency['first_scan_ms']:.0f} ms, steady p50 {latency['steady_p50_ms']:.0f} ms "
+                f"({samples[0] / max(_percentile(steady, 50), 1e-9):.1f}x)")
+
+    def report():
+        from tuklas.report import create_pdf
+        img = state["image"]
+        summary = core.summarize(state["dets"], state["model"].names, img.size)
+        pdf = create_pdf([img] * 4, summary["classes"][0] if summary["classes"] else "No lesions",
+                         summary["confidence"], None, case_id="TK-00000000-00000", ranking=summary["ranking"])
+        return f"{len(pdf) / 1024:.0f} KB PDF with local QR code"
+
+    def app():
+        try:
+            from streamlit.testing.v1 import AppTest
+        except ImportError:
+            return "skipped (streamlit not installed)"
+        at = AppTest.from_file(os.path.join(core.folder, "app.py"), default_timeout=120).run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        # Offline mode preloads the model in a background thread; let it finish rather than kill it at exit.
+        preload = [t for t in threading.enumerate() if t.name == "tuklas-preload"]
+        for thread in preload:
+            thread.join()
+        return "renders without errors" + (", model preloaded" if preload else "")
+
+    run("assets", assets)
+    if run("model", model):
+        run("scan", scan) and run("report", report)
+    elif args.offline:
+        checks[-1]["detail"] += " (exports are built on first load: run `tuklas check` once while online)"
+    if not args.skip_app:
+        run("app", app)
+
+    ok = all(c["ok"] for c in checks)
+    payload = {"offline": args.offline, "ok": ok, "latency": latency, "checks": checks, "blocked_connections": blocked}
+    json.dump(payload, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    if blocked:
+        print(f"blocked {len(blocked)} outbound connection attempts: {', '.join(sorted(set(blocked)))}", file=sys.stderr)
+    return 0 if ok else 1
+
+def add_store_args(parser):
+    parser.add_argument("--farm", default="", help="Farm / owner recorded with each case")
+    parser.add_argument("--pen", default="", help="Pen / group recorded with each case")
+    parser.add_argument("--no-store", action="store_true", help="Do not record the scans in the case store")
+
+def add_backend_args(parser):
+    from tuklas.backends import BACKENDS
+    parser.add_argument("--backend", choices=BACKENDS, help="Inference backend (default: config / TUKLAS_BACKEND)")
+    parser.add_argument("--threads", type=int, help="CPU threads for inference (default: config / TUKLAS_THREADS)")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="tuklas", description="TUKLAS pig skin lesion detection (headless)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    scan = sub.add_parser("scan", help="Scan images, folders or ZIP archives")
+    scan.add_argument("paths", nargs="+", help="Image files, directories or .zip archives")
+    scan.add_argument("--model", default=core.MODEL_PATH, help="Path to YOLO weights (default: best.pt)")
+    scan.add_argument("--conf", type=float, default=0.40, help="Sensitivity / confidence threshold")
+    scan.add_argument("--batch-size", type=int, default=8)
+    scan.add_argument("--json", help="Write full results (with boxes and timing) to this JSON file")
+    scan.add_argument("--csv", help="Write the per-image summary table to this CSV file")
+    scan.add_argument("--tiling", choices=["auto", "on", "off"],
+                      help="Scan large photos as overlapping tiles (default: config / TUKLAS_TILING)")
+    add_store_args(scan)
+    add_backend_args(scan)
+    scan.set_defaults(func=cmd_scan)
+
+    video = sub.add_parser("video", help="Scan a video file, camera index or stream URL")
+    video.add_argument("source", help="Video file, camera index (0, 1, ...) or rtsp:// / http:// URL")
+    video.add_argument("--model", default=core.MODEL_PATH, help="Path to YOLO weights (default: best.pt)")
+    video.add_argument("--conf", type=float, default=0.40, help="Sensitivity / confidence threshold")
+    video.add_argument("--batch-size", type=int, default=8)
+    video.add_argument("--all-frames", action="store_true", help="Scan every frame instead of sampling to keep real time")
+    video.add_argument("--max-frames", type=int, help="Stop after scanning this many frames")
+    video.add_argument("--max-seconds", type=float, help="Stop after this many seconds (useful for live streams)")
+    video.add_argument("--json", help="Write the per-class summary and FPS report to this JSON file")
+    add_store_args(video)
+    add_backend_args(video)
+    video.set_defaults(func=cmd_video)
+
+    backends = sub.add_parser("backends", help="Compare latency and outputs of inference backends")
+    backends.add_argument("paths", nargs="+", help="Sample images, directories or .zip archives")
+    backends.add_argument("--model", default=core.MODEL_PATH, help="Path to YOLO weights (default: best.pt)")
+    backends.add_argument("--backends", nargs="+", default=["pytorch", "onnx", "onnx-int8"],
+                          help="Backends to compare; the first is the reference for output deviation")
+    backends.add_argument("--conf", type=float, default=0.25)
+    backends.add_argument("--runs", type=int, default=3)
+    backends.add_argument("--threads", type=int)
+    backends.add_argument("--max-images", type=int, default=16)
+    backends.set_defaults(func=cmd_backends)
+
+    serve = sub.add_parser("serve", help="Run the local HTTP API (scan, batch-scan, report, health, metrics)")
+    serve.add_argument("--host", default="127.0.0.1", help="Interface to bind; 0.0.0.0 exposes it to the farm network")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--model", default=core.MODEL_PATH, help="Path to YOLO weights (default: best.pt)")
+    serve.add_argument("--workers", type=int, help="Request worker threads (default: config queue_size)")
+    add_backend_args(serve)
+    serve.set_defaults(func=cmd_serve)
+
+    check = sub.add_parser("check", help="Verify the model, scanning, reports and app work on this device")
+    check.add_argument("paths", nargs="*", help="Sample images (default: a synthetic photo)")
+    check.add_argument("--offline", action="store_true", help="Block all network access while checking")
+    check.add_argument("--model", default=core.MODEL_PATH, help="Path to YOLO weights (default: best.pt)")
+    check.add_argument("--conf", type=float, default=0.40)
+    check.add_argument("--runs", type=int, default=10, help="Scans after the first, for steady-state latency")
+    check.add_argument("--warmup-runs", type=int, help="Warm-up passes before the first scan (default: config)")
+    check.add_argument("--skip-app", action="store_true", help="Do not start the Streamlit app")
+    add_backend_args(check)
+    check.set_defaults(func=cmd_check)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+if __name__ == "__main__":
+    raise SystemExit(main())
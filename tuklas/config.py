@@ -0,0 +1,45 @@
+import json
+import os
+
+# --- 1. RUNTIME SETTINGS ---
+# Precedence: environment (TUKLAS_<NAME>) > tuklas.json next to app.py > defaults.
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tuklas.json")
+DEFAULTS = {
+    "backend": "pytorch",
+    "threads": 0,
+    "imgsz": 640,
+    "warmup_runs": 2,
+    # Edge mode: bundled assets only, no outbound requests, and the model is loaded and warmed at app start.
+    "offline": False,
+    "tiling": "auto",
+    "queue_size": 32,
+    "max_batch": 8,
+    "batch_wait_ms": 10,
+    "report_workers": 0,
+    # High-accuracy mode: augmented views (and extra weight files next to best.pt) within a per-photo budget.
+    "tta_budget_ms": 2000,
+    "tta_views": 5,
+    "ensemble_weights": [],
+    "knowledge_base": os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "knowledge_base.json"),
+    "metrics_dir": os.path.join(os.path.dirname(CONFIG_PATH), "metrics"),
+    "store_path": os.path.join(os.path.dirname(CONFIG_PATH), "tuklas_cases.db"),
+    "alert_window_days": 7,
+    "alert_thresholds": {"CRITICAL": 1, "HIGH": 3, "MODERATE": 5},
+}
+
+def load_config(path=CONFIG_PATH):
+    config = dict(DEFAULTS)
+    if os.path.exists(path):
+        with open(path) as f:
+            config.update(json.load(f))
+    for key, default in DEFAULTS.items():
+        value = os.environ.get(f"TUKLAS_{key.upper()}")
+        if value is None:
+            continue
+        if isinstance(default, bool):
+            config[key] = value.lower() in ("1", "true", "yes")
+        elif isinstance(default, (dict, list)):
+            config[key] = json.loads(value)
+        else:
+            config[key] = type(default)(value)
+    return config
@@ -0,0 +1,244 @@
+import csv
+import io
+import os
+import random
+import numpy as np
+
+from tuklas.boxes import box_area
+from tuklas.knowledge import entry_level, knowledge_index
+
+# --- 1. MODEL LOADING ---
+folder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_PATH = os.path.join(folder, "best.pt")
+
+# Cached detections come from one pass at this floor, so any Sensitivity >= it is a pure re-filter.
+DETECTION_FLOOR = 0.05
+
+def load_model(model_path=MODEL_PATH, backend=None, threads=None, imgsz=None, warmup_runs=None):
+    # Backends (and ultralytics/torch/onnxruntime behind them) are only imported once a model is actually requested.
+    from tuklas.backends import load_backend
+    from tuklas.config import load_config
+    config = load_config()
+    if config["offline"]:
+        # Skips ultralytics' DNS probe at import and every hub/telemetry call after it.
+        os.environ.setdefault("YOLO_OFFLINE", "true")
+    model = load_backend(
+        model_path,
+        backend or config["backend"],
+        config["threads"] if threads is None else threads,
+        imgsz or config["imgsz"],
+    )
+    # Resolve every class against the knowledge base now, so unmapped classes are reported at load time.
+    knowledge_index(model.names)
+    warm_up(model, config["warmup_runs"] if warmup_runs is None else warmup_runs)
+    return model
+
+def warm_up(model, runs):
+    # The first predict pays for lazy setup (ultralytics predictor and layer fusion, ONNX Runtime memory arenas),
+    # so it is spent on a blank frame at load time instead of on the first real scan.
+    if runs <= 0:
+        return
+    blank = np.zeros((model.imgsz, model.imgsz, 3), dtype=np.uint8)
+    for _ in range(runs):
+        model.predict_detections([blank], 0.25)
+    model.latency = type(model.latency)()
+
+# --- 2. DETECTIONS & INFERENCE ---
+BOX_COLORS = [(255, 56, 56), (255, 157, 151), (255, 112, 31), (72, 249, 10), (0, 194, 255), (146, 204, 23)]
+
+class Detections:
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = np.asarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        self.conf = np.asarray(conf, dtype=np.float32).reshape(-1)
+        self.cls = np.asarray(cls, dtype=np.int64).reshape(-1)
+
+    @classmethod
+    def from_result(cls, result):
+        boxes = result.boxes
+        return cls(boxes.xyxy.cpu().numpy(), boxes.conf.cpu().numpy(), boxes.cls.cpu().numpy())
+
+    def __len__(self):
+        return len(self.conf)
+
+    def filter(self, conf):
+        keep = self.conf >= conf
+        return Detections(self.xyxy[keep], self.conf[keep], self.cls[keep])
+
+    def class_names(self, names):
+        return [names[int(c)] for c in self.cls]
+
+    def to_list(self, names):
+        return [
+            {"class": names[int(c)], "confidence": round(float(p), 4), "box": [round(float(v), 1) for v in box]}
+            for box, p, c in zip(self.xyxy, self.conf, self.cls)
+        ]
+
+def iter_chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def predict(model, images, conf, **kwargs):
+    return model.predict_detections(images, conf, **kwargs)
+
+def predict_batch(model, named_images, conf, batch_size, tiling="off", tile_size=640):
+    # One model.predict call per chunk, so the network sees a real batch instead of one frame per call.
+    # Photos large enough to tile are scanned on their own, each as one batch of its tiles.
+    # Items are (name, image, ...); anything after the image (e.g. its hash) is passed through after the detections.
+    from tuklas.tiling import needs_tiling, predict_tiled
+    for chunk in iter_chunks(named_images, batch_size):
+        tiled = [needs_tiling(item[1], tile_size, tiling) for item in chunk]
+        small = [item[1] for item, t in zip(chunk, tiled) if not t]
+        single = iter(predict(model, small, conf) if small else [])
+        yield [(name, predict_tiled(model, img, conf, tile_size) if t else next(single), *rest)
+               for (name, img, *rest), t in zip(chunk, tiled)]
+
+def predict_cached(model, cache, key, img, conf, tiling="off", tile_size=640, **kwargs):
+    from tuklas.tiling import predict_image
+    # Cached passes stop at the floor, so a Sensitivity below it always goes to the model (and is not cached).
+    dets = cache.get(key) if conf >= DETECTION_FLOOR else None
+    if dets is None:
+        dets = predict_image(model, img, min(conf, DETECTION_FLOOR), tiling, tile_size, **kwargs)
+        if conf >= DETECTION_FLOOR:
+            cache.put(key, dets)
+    return dets.filter(conf)
+
+def plot_detections(img, dets, names):
+    import cv2
+    canvas = np.array(img.convert("RGB"))
+    line = max(2, round(sum(canvas.shape[:2]) / 2 * 0.003))
+    for box, p, c in zip(dets.xyxy.astype(int), dets.conf, dets.cls):
+        color = BOX_COLORS[int(c) % len(BOX_COLORS)]
+        x1, y1, x2, y2 = box.tolist()
+        cv2.rectangle(canvas, (x1, y1), (x2, y2), color, line, cv2.LINE_AA)
+        label = f"{names[int(c)]} {p:.2f}"
+        scale = line / 3
+        (tw, th), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, scale, max(line - 1, 1))
+        top = y1 - th - 6 if y1 - th - 6 >= 0 else y1
+        cv2.rectangle(canvas, (x1, top), (x1 + tw + 4, top + th + 6), color, -1, cv2.LINE_AA)
+        cv2.putText(canvas, label, (x1 + 2, top + th + 2), cv2.FONT_HERSHEY_SIMPLEX, scale,
+                    (255, 255, 255), max(line - 1, 1), cv2.LINE_AA)
+    return canvas
+
+# --- 3. CONFIDENCE AGGREGATION ---
+def class_evidence(dets, n=0):
+    # Per-class box count, summed confidence, best box and total box area, indexed by class id, straight from the
+    # box arrays (bincount / maximum.at, no per-box Python loop). Arrays are at least `n` long.
+    n = max(n, int(dets.cls.max()) + 1) if len(dets) else n
+    counts = np.bincount(dets.cls, minlength=n)
+    conf_sum = np.bincount(dets.cls, weights=dets.conf, minlength=n)
+    conf_max = np.zeros(n)
+    np.maximum.at(conf_max, dets.cls, dets.conf)
+    area = np.bincount(dets.cls, weights=box_area(dets.xyxy), minlength=n)
+    return counts, conf_sum, conf_max, area
+
+def rank_evidence(names, counts, conf_sum, conf_max, area, image_area=None):
+    # One ranked row per class with evidence, for a photo or a whole video: by knowledge-base severity, then summed
+    # confidence, then best single box, then class id for stable ties.
+    kb = knowledge_index(names)
+    ids = np.flatnonzero(counts)
+    severity = np.pad(kb.severity, (0, max(0, len(counts) - len(kb.severity))))
+    order = ids[np.lexsort((ids, -conf_max[ids], -conf_sum[ids], -severity[ids]))]
+    return [
+        {
+            "class": names[int(c)],
+            "class_id": int(c),
+            "severity": entry_level(kb.info(c)) or "-",
+            "count": int(counts[c]),
+            "mean_confidence": float(conf_sum[c] / counts[c]) * 100,
+            "max_confidence": float(conf_max[c]) * 100,
+            "area_px": float(area[c]),
+            "area_pct": float(area[c]) / image_area * 100 if image_area else None,
+        }
+        for c in order
+    ]
+
+def rank_classes(dets, names, image_size=None):
+    if len(dets) == 0:
+        return []
+    evidence = class_evidence(dets, len(knowledge_index(names).severity))
+    return rank_evidence(names, *evidence, float(image_size[0] * image_size[1]) if image_size else None)
+
+def ranking_rows(ranking):
+    rows = []
+    for r in ranking:
+        row = {"Class": r["class"], "Severity": r["severity"], "Boxes": r["count"],
+               "Mean Confidence (%)": round(r["mean_confidence"], 1), "Max Confidence (%)": round(r["max_confidence"], 1),
+               "Lesion Area (%)": round(r["area_pct"], 2) if r["area_pct"] is not None else None}
+        if "frames" in r:
+            # Video rankings also count the scanned frames each class appeared in.
+            row["Frames"] = r["frames"]
+        rows.append(row)
+    return rows
+
+def summarize(dets, names, image_size=None):
+    # `confidence` is the headline class's own mean, so a co-detected Healthy box cannot dilute a CRITICAL finding.
+    ranking = rank_classes(dets, names, image_size)
+    return {
+        "classes": [r["class"] for r in ranking],
+        "count": len(dets),
+        "confidence": ranking[0]["mean_confidence"] if ranking else 0.0,
+        "ranking": ranking,
+    }
+
+def case_record(image_hash, dets, names, image_size=None, **fields):
+    # One CaseStore.add_cases record for a scanned photo; `fields` are farm, pen, model and created_at.
+    summary = summarize(dets, names, image_size)
+    return dict(image_hash=image_hash, detections=dets.to_list(names),
+                diagnosis=summary["classes"][0] if summary["classes"] else None, confidence=summary["confidence"],
+                **fields)
+
+def summary_row(file_name, dets, names):
+    summary = summarize(dets, names)
+    diagnosis = summary["classes"][0] if summary["classes"] else "No lesions"
+    info = knowledge_index(names).info(summary["ranking"][0]["class_id"]) if summary["ranking"] else None
+    info = info or {}
+    return {
+        "File": file_name,
+        "Diagnosis": diagnosis,
+        "Severity": info.get("severity", "-"),
+        "Detections": summary["count"],
+        "Confidence (%)": round(summary["confidence"], 1),
+        "Classes": ", ".join(summary["classes"]),
+    }
+
+def rows_to_csv(rows):
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=list(rows[0].keys()))
+    writer.writeheader()
+    writer.writerows(rows)
+    return buf.getvalue().encode('utf-8')
+
+# --- 4. REPORT GENERATOR HELPER ---
+def generate_smart_report(detected_class, count, confidence):
+    intros = [
+        f"Analysis of the uploaded specimen indicates the presence of <b>{count} distinct anomaly/anomalies</b>.",
+        f"The TUKLAS diagnostic system has flagged <b>{count} region(s) of interest</b> in this sample.",
+        f"Based on visual dermatological patterns, our AI identified <b>{count} area(s)</b> requiring attention.",
+        f"A thorough scan of the tissue sample reveals <b>{count} point(s) of concern</b>."
+    ]
+    descriptions = [
+        f"The morphological features are highly consistent with <b>{detected_class}</b>.",
+        f"The AI has classified the skin texture and discoloration patterns as <b>{detected_class}</b>.",
+        f"Visual indicators suggest a high probability of <b>{detected_class}</b>.",
+        f"The detected lesions exhibit characteristics typical of <b>{detected_class}</b>."
+    ]
+    actions = [
+        f"With a confidence score of <b>{confidence:.1f}%</b>, immediate veterinary assessment is recommended.",
+        f"The system is <b>{confidence:.1f}%</b> certain of this diagnosis. Please refer to the treatment protocols below.",
+        f"Given the high confidence (<b>{confidence:.1f}%</b>), isolation protocols should be initiated immediately.",
+        f"The model's certainty is <b>{confidence:.1f}%</b>. We advise cross-referencing this with a physical exam."
+    ]
+    
+    if "Healthy" in detected_class:
+        return (f"Analysis complete. The system detected <b>{count} region(s)</b> classified as "
+                f"<b>Healthy Skin</b>. With a confidence of <b>{confidence:.1f}%</b>, the animal "
+                "appears free of visible pathologies.")
+
+    text = f"{random.choice(intros)} {random.choice(descriptions)} {random.choice(actions)}"
+    return text
@@ -0,0 +1,28 @@
+import datetime
+
+from tuklas.knowledge import severity_level
+
+# --- 1. ALERT RULES ---
+def window_start(days, today=None):
+    return (today or datetime.date.today()) - datetime.timedelta(days=days - 1)
+
+def find_alerts(store, thresholds, window_days=7, farm=None, today=None):
+    # `thresholds` maps the first word of a class severity ("CRITICAL") to the positive scans per pen that raise
+    # an alert. Reads only the per-pen rollups, so the check costs the same with ten or ten thousand stored scans.
+    alerts = []
+    for row in store.pen_breakdown(window_start(window_days, today), farm):
+        level = severity_level(row["class"])
+        limit = thresholds.get(level)
+        if limit and row["scans"] >= limit:
+            alerts.append({
+                "Farm": row["farm"] or "-",
+                "Pen": row["pen"] or "-",
+                "Class": row["class"],
+                "Severity": level,
+                "Positive Scans": row["scans"],
+                "Threshold": limit,
+                "Detections": row["detections"],
+                "Max Confidence (%)": round(row["conf_max"] * 100, 1),
+                "Last Seen": row["last_seen"],
+            })
+    return sorted(alerts, key=lambda a: (list(thresholds).index(a["Severity"]), -a["Positive Scans"]))
@@ -0,0 +1,80 @@
+import io
+import math
+import os
+import zipfile
+from PIL import Image, ImageOps
+
+from tuklas.cache import bytes_hash, file_hash
+from tuklas.imaging import DERIVATIVE_MAX_SIDE
+from tuklas.tiling import MAX_TILES_PER_SIDE
+
+# HEIC is what iPhones save by default; it needs the optional pillow-heif plugin (pip install tuklas-app[heic]).
+try:
+    from pillow_heif import register_heif_opener
+    register_heif_opener()
+    HEIF_EXTENSIONS = ('.heic', '.heif')
+except ImportError:
+    HEIF_EXTENSIONS = ()
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp') + HEIF_EXTENSIONS
+
+# --- 1. INGEST ---
+def ingest_side(tile_size=640, tiling="auto"):
+    # Largest long side anything downstream can use. Tiled inference spreads at most MAX_TILES_PER_SIDE model
+    # inputs across a photo, so pixels beyond that are resized away; untiled, the 1024 px panels are the limit.
+    if tiling == "off":
+        return max(tile_size, DERIVATIVE_MAX_SIDE)
+    return tile_size * MAX_TILES_PER_SIDE
+
+def load_image(source, max_side=None):
+    # One decode per upload: reduced-scale JPEG decoding, EXIF orientation, RGB, then a final resize to max_side.
+    img = Image.open(source)
+    if max_side and max(img.size) > max_side:
+        scale = max_side / max(img.size)
+        # The decoder picks the largest 1/2, 1/4 or 1/8 scale still covering this size; a no-op except for JPEG.
+        img.draft("RGB", (math.ceil(img.width * scale), math.ceil(img.height * scale)))
+    img.load()
+    ImageOps.exif_transpose(img, in_place=True)
+    if img.mode in ("RGBA", "LA", "PA") or (img.mode == "P" and "transparency" in img.info):
+        # Transparent pixels would otherwise come out as whatever colour they hide, usually black.
+        rgba = img.convert("RGBA")
+        img = Image.new("RGB", rgba.size, (255, 255, 255))
+        img.paste(rgba, mask=rgba.getchannel("A"))
+    elif img.mode != "RGB":
+        img = img.convert("RGB")
+    if max_side and max(img.size) > max_side:
+        img.thumbnail((max_side, max_side), Image.Resampling.BILINEAR, reducing_gap=2.0)
+    return img
+
+# --- 2. BATCH SOURCES ---
+# With with_hash=True each item is (name, image, SHA-256 of the original file bytes), the key stored cases use.
+def _iter_zip(zf, max_side=None, with_hash=False):
+    for member in sorted(zf.namelist()):
+        if member.lower().endswith(IMAGE_EXTENSIONS) and not member.startswith('__MACOSX'):
+            with zf.open(member) as fh:
+                data = fh.read()
+            img = load_image(io.BytesIO(data), max_side)
+            yield (member, img, bytes_hash(data)) if with_hash else (member, img)
+
+def iter_batch_images(uploaded_files, max_side=None, with_hash=False):
+    for f in uploaded_files:
+        if f.name.lower().endswith('.zip'):
+            with zipfile.ZipFile(f) as zf:
+                yield from _iter_zip(zf, max_side, with_hash)
+        elif f.name.lower().endswith(IMAGE_EXTENSIONS):
+            img = load_image(f, max_side)
+            yield (f.name, img, bytes_hash(f.getvalue())) if with_hash else (f.name, img)
+
+def iter_path_images(paths, max_side=None, with_hash=False):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    yield from iter_path_images([os.path.join(root, name)], max_side, with_hash)
+        elif path.lower().endswith('.zip'):
+            with zipfile.ZipFile(path) as zf:
+                for member, *rest in _iter_zip(zf, max_side, with_hash):
+                    yield (f"{path}:{member}", *rest)
+        elif path.lower().endswith(IMAGE_EXTENSIONS):
+            img = load_image(path, max_side)
+            yield (path, img, file_hash(path)) if with_hash else (path, img)
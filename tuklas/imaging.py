@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+# --- 1. DERIVATIVE PANELS ---
+# The UI shows the panels in a half-width column and the PDF prints them at 43x35 mm
+# (516x420 px), so nothing above this size is ever visible.
+DERIVATIVE_MAX_SIDE = 1024
+CONTRAST_FACTOR = 1.5
+# ImageFilter.FIND_EDGES followed by ImageOps.invert, folded into one kernel:
+# saturate(255 - conv(k)) == 255 - saturate(conv(k)) == saturate(conv(-k) + 255).
+INVERTED_EDGE_KERNEL = -np.array([[-1, -1, -1], [-1, 8, -1], [-1, -1, -1]], dtype=np.float32)
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="tuklas-derivatives")
+
+def downscale(img, max_side):
+    # Box-reduce by an integer factor inside PIL first, so the full-resolution frame is never copied
+    # into NumPy; the remaining (< 2x) step is small enough for bilinear resampling.
+    import cv2
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    factor = max(img.size) // max_side
+    if factor >= 2:
+        img = img.reduce(factor)
+    rgb = np.asarray(img)
+    h, w = rgb.shape[:2]
+    scale = max_side / max(h, w)
+    if scale >= 1:
+        return rgb
+    return cv2.resize(rgb, (round(w * scale), round(h * scale)), interpolation=cv2.INTER_LINEAR)
+
+def make_derivatives(img, max_side=DERIVATIVE_MAX_SIDE):
+    import cv2
+    rgb = downscale(img, max_side)
+    gray = cv2.cvtColor(rgb, cv2.COLOR_RGB2GRAY)
+    # Same definition as ImageEnhance.Contrast: blend away from the mean grey level.
+    mean = int(gray.mean() + 0.5)
+    contrast = cv2.addWeighted(rgb, CONTRAST_FACTOR, rgb, 0.0, (1 - CONTRAST_FACTOR) * mean)
+    edge = cv2.filter2D(gray, -1, INVERTED_EDGE_KERNEL, delta=255, borderType=cv2.BORDER_REPLICATE)
+    return Image.fromarray(contrast), Image.fromarray(edge)
+
+def make_derivatives_async(img, max_side=DERIVATIVE_MAX_SIDE):
+    # OpenCV releases the GIL, so this overlaps with model inference on the request thread.
+    return _executor.submit(make_derivatives, img, max_side)
@@ -0,0 +1,83 @@
+import functools
+import json
+import warnings
+
+import numpy as np
+
+from tuklas.config import load_config
+
+# --- 1. MEDICAL KNOWLEDGE BASE ---
+# Loaded from tuklas/data/knowledge_base.json (or the knowledge_base config path), so a new disease is a data
+# change: add an entry keyed by the model's class name, or by a substring of it.
+REQUIRED_FIELDS = ("severity", "cause", "harm", "materials", "prevention", "steps")
+DRUG_FIELDS = ("drug_name", "dosage_rate", "dosage_per_kg")
+
+def load_knowledge(path):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    for name, entry in data.items():
+        missing = [k for k in REQUIRED_FIELDS if k not in entry]
+        if missing:
+            raise ValueError(f"Knowledge base entry '{name}' in {path} is missing: {', '.join(missing)}")
+        if "drug_name" in entry and not all(k in entry for k in DRUG_FIELDS):
+            raise ValueError(f"Knowledge base entry '{name}' in {path} needs all of: {', '.join(DRUG_FIELDS)}")
+    return data
+
+medical_data = load_knowledge(load_config()["knowledge_base"])
+DRUGS = {entry["drug_name"]: entry for entry in medical_data.values() if "drug_name" in entry}
+
+# --- 2. CLASS RESOLUTION ---
+def match_key(det_class, kb=medical_data):
+    if det_class in kb:
+        return det_class
+    for k in kb.keys():
+        if k in det_class or det_class in k:
+            return k
+    return None
+
+@functools.lru_cache(maxsize=256)
+def _resolved_key(det_class):
+    return match_key(det_class)
+
+def resolve_info(det_class):
+    key = _resolved_key(det_class)
+    return medical_data[key] if key else None
+
+# Lowest to highest; classes without a knowledge base entry rank with OPTIMAL.
+SEVERITY_LEVELS = ("OPTIMAL", "MODERATE", "HIGH", "CRITICAL")
+
+def entry_level(entry):
+    return (entry or {}).get("severity", "").split(" ")[0].upper()
+
+def level_rank(level):
+    return SEVERITY_LEVELS.index(level) if level in SEVERITY_LEVELS else 0
+
+def severity_level(det_class):
+    return entry_level(resolve_info(det_class))
+
+# --- 3. PER-MODEL INDEX ---
+class KnowledgeIndex:
+    # Every model class ID resolved once to its entry, drug record and severity rank.
+    def __init__(self, names, kb=medical_data):
+        self.names = dict(names)
+        self.keys = {i: match_key(name, kb) for i, name in self.names.items()}
+        self.entries = {i: kb[k] if k else None for i, k in self.keys.items()}
+        self.drugs = {i: e for i, e in self.entries.items() if e and "drug_name" in e}
+        size = max(self.names, default=-1) + 1
+        self.severity = np.zeros(size, dtype=np.int64)
+        for i, entry in self.entries.items():
+            self.severity[i] = level_rank(entry_level(entry))
+        self.unmapped = [self.names[i] for i, k in self.keys.items() if k is None]
+
+    def info(self, class_id):
+        return self.entries.get(int(class_id))
+
+@functools.lru_cache(maxsize=8)
+def _build_index(names_items):
+    index = KnowledgeIndex(dict(names_items))
+    if index.unmapped:
+        warnings.warn(f"No knowledge base entry for model classes: {', '.join(index.unmapped)}", stacklevel=3)
+    return index
+
+def knowledge_index(names):
+    return _build_index(tuple(sorted(names.items())))
@@ -0,0 +1,110 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+# --- 1. PER-REQUEST TIMING ---
+class StageTimer:
+    def __init__(self):
+        self.stages = OrderedDict()
+
+    @contextmanager
+    def stage(self, name):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - t
+
+    @property
+    def total(self):
+        # Dotted names ("pdf.qr") are sub-stages already counted inside their parent.
+        return sum(s for name, s in self.stages.items() if "." not in name)
+
+    def rows(self):
+        total = self.total or 1.0
+        return [{"Stage": name, "ms": round(s * 1000, 1), "Share (%)": round(100 * s / total, 1)}
+                for name, s in self.stages.items()]
+
+def stage(timer, name):
+    # Lets library code accept an optional timer without branching at every call site.
+    return timer.stage(name) if timer is not None else nullcontext()
+
+# --- 2. ROLLING AGGREGATES ---
+class MetricsRegistry:
+    # Last `window` samples per stage for quantiles, plus per-minute buckets covering one day for charting.
+    def __init__(self, window=500, minutes=24 * 60):
+        self.window = window
+        self.minutes = minutes
+        self._samples = {}
+        self._totals = {}
+        self._timeline = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, timer, kind="scan"):
+        minute = int(time.time() // 60) * 60
+        with self._lock:
+            bucket = self._timeline.setdefault(minute, {})
+            for name, seconds in list(timer.stages.items()) + [("total", timer.total)]:
+                key = f"{kind}.{name}"
+                self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+                count, total = self._totals.get(key, (0, 0.0))
+                self._totals[key] = (count + 1, total + seconds)
+                b = bucket.setdefault(key, [0, 0.0, 0.0])
+                b[0] += 1
+                b[1] += seconds
+                b[2] = max(b[2], seconds)
+            while len(self._timeline) > self.minutes:
+                self._timeline.popitem(last=False)
+
+    def snapshot(self):
+        with self._lock:
+            stages = {}
+            for key, samples in self._samples.items():
+                arr = np.fromiter(samples, dtype=np.float64)
+                count, total = self._totals[key]
+                stages[key] = {
+                    "count": count,
+                    "sum_s": round(total, 6),
+                    "p50_ms": round(float(np.percentile(arr, 50)) * 1000, 2),
+                    "p95_ms": round(float(np.percentile(arr, 95)) * 1000, 2),
+                    "max_ms": round(float(arr.max()) * 1000, 2),
+                }
+            timeline = [
+                {"minute": minute, **{k: {"count": c, "mean_ms": round(s / c * 1000, 2), "max_ms": round(m * 1000, 2)}
+                                      for k, (c, s, m) in bucket.items()}}
+                for minute, bucket in self._timeline.items()
+            ]
+        return {"generated_at": int(time.time()), "window": self.window, "stages": stages, "timeline": timeline}
+
+    def to_prometheus(self, snapshot=None):
+        snapshot = snapshot or self.snapshot()
+        lines = [
+            "# HELP tuklas_stage_seconds Latency of TUKLAS pipeline stages over the recent sample window.",
+            "# TYPE tuklas_stage_seconds summary",
+        ]
+        for key, s in snapshot["stages"].items():
+            kind, name = key.split(".", 1)
+            labels = f'kind="{kind}",stage="{name}"'
+            lines.append(f'tuklas_stage_seconds{{{labels},quantile="0.5"}} {s["p50_ms"] / 1000:.6f}')
+            lines.append(f'tuklas_stage_seconds{{{labels},quantile="0.95"}} {s["p95_ms"] / 1000:.6f}')
+            lines.append(f"tuklas_stage_seconds_sum{{{labels}}} {s['sum_s']:.6f}")
+            lines.append(f"tuklas_stage_seconds_count{{{labels}}} {s['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, directory):
+        # Atomic replace so a scraper (e.g. node_exporter's textfile collector) never reads a half-written file.
+        os.makedirs(directory, exist_ok=True)
+        snapshot = self.snapshot()
+        for name, text in (("tuklas_metrics.json", json.dumps(snapshot, indent=1)),
+                           ("tuklas_metrics.prom", self.to_prometheus(snapshot))):
+            path = os.path.join(directory, name)
+            with open(path + ".tmp", "w") as f:
+                f.write(text)
+            os.replace(path + ".tmp", path)
+
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,248 @@
+import numpy as np
+from PIL import Image
+
+# Offline QR Code encoder (ISO/IEC 18004, byte mode, versions 1-10).
+# Verification URLs are ~50 bytes, which fits version 4 at level M, so the
+# tables stop at version 10 and levels L/M.
+
+# --- 1. TABLES ---
+ECC_FORMAT_BITS = {"L": 1, "M": 0}
+ECC_CODEWORDS_PER_BLOCK = {
+    "L": (None, 7, 10, 15, 20, 26, 18, 20, 24, 30, 18),
+    "M": (None, 10, 16, 26, 18, 24, 16, 18, 22, 22, 26),
+}
+NUM_ECC_BLOCKS = {
+    "L": (None, 1, 1, 1, 1, 1, 2, 2, 2, 2, 4),
+    "M": (None, 1, 1, 1, 2, 2, 4, 4, 4, 5, 5),
+}
+MAX_VERSION = 10
+MASK_PATTERNS = (
+    lambda x, y: (x + y) % 2,
+    lambda x, y: y % 2,
+    lambda x, y: x % 3,
+    lambda x, y: (x + y) % 3,
+    lambda x, y: (x // 3 + y // 2) % 2,
+    lambda x, y: x * y % 2 + x * y % 3,
+    lambda x, y: (x * y % 2 + x * y % 3) % 2,
+    lambda x, y: ((x + y) % 2 + x * y % 3) % 2,
+)
+
+def _raw_data_modules(ver):
+    result = (16 * ver + 128) * ver + 64
+    if ver >= 2:
+        numalign = ver // 7 + 2
+        result -= (25 * numalign - 10) * numalign - 55
+        if ver >= 7:
+            result -= 36
+    return result
+
+def _data_codewords(ver, ecl):
+    return _raw_data_modules(ver) // 8 - ECC_CODEWORDS_PER_BLOCK[ecl][ver] * NUM_ECC_BLOCKS[ecl][ver]
+
+def _alignment_positions(ver, size):
+    if ver == 1:
+        return []
+    numalign = ver // 7 + 2
+    step = (ver * 8 + numalign * 3 + 5) // (numalign * 4 - 4) * 2
+    return [6] + sorted(size - 7 - i * step for i in range(numalign - 1))
+
+# --- 2. REED-SOLOMON ---
+def _rs_multiply(x, y):
+    z = 0
+    for i in reversed(range(8)):
+        z = (z << 1) ^ ((z >> 7) * 0x11D)
+        z ^= ((y >> i) & 1) * x
+    return z
+
+def _rs_divisor(degree):
+    result = [0] * (degree - 1) + [1]
+    root = 1
+    for _ in range(degree):
+        for j in range(degree):
+            result[j] = _rs_multiply(result[j], root)
+            if j + 1 < degree:
+                result[j] ^= result[j + 1]
+        root = _rs_multiply(root, 0x02)
+    return result
+
+def _rs_remainder(data, divisor):
+    result = [0] * len(divisor)
+    for b in data:
+        factor = b ^ result.pop(0)
+        result.append(0)
+        for i, coef in enumerate(divisor):
+            result[i] ^= _rs_multiply(coef, factor)
+    return result
+
+def _add_ecc_and_interleave(data, ver, ecl):
+    numblocks = NUM_ECC_BLOCKS[ecl][ver]
+    blockecclen = ECC_CODEWORDS_PER_BLOCK[ecl][ver]
+    rawcodewords = _raw_data_modules(ver) // 8
+    numshortblocks = numblocks - rawcodewords % numblocks
+    shortblocklen = rawcodewords // numblocks
+    divisor = _rs_divisor(blockecclen)
+    blocks, k = [], 0
+    for i in range(numblocks):
+        dat = data[k:k + shortblocklen - blockecclen + (0 if i < numshortblocks else 1)]
+        k += len(dat)
+        ecc = _rs_remainder(dat, divisor)
+        if i < numshortblocks:
+            dat.append(0)
+        blocks.append(dat + ecc)
+    result = []
+    for i in range(len(blocks[0])):
+        for j, blk in enumerate(blocks):
+            # Skip the padding byte inserted into short blocks.
+            if i != shortblocklen - blockecclen or j >= numshortblocks:
+                result.append(blk[i])
+    return result
+
+# --- 3. SYMBOL CONSTRUCTION ---
+class _Symbol:
+    def __init__(self, ver, ecl):
+        self.ver = ver
+        self.ecl = ecl
+        self.size = ver * 4 + 17
+        self.modules = np.zeros((self.size, self.size), dtype=bool)
+        self.isfunction = np.zeros((self.size, self.size), dtype=bool)
+        self._draw_function_patterns()
+
+    def _set_function(self, x, y, dark):
+        self.modules[y, x] = dark
+        self.isfunction[y, x] = True
+
+    def _draw_function_patterns(self):
+        size = self.size
+        for i in range(size):
+            self._set_function(6, i, i % 2 == 0)
+            self._set_function(i, 6, i % 2 == 0)
+        for cx, cy in ((3, 3), (size - 4, 3), (3, size - 4)):
+            for dy in range(-4, 5):
+                for dx in range(-4, 5):
+                    x, y = cx + dx, cy + dy
+                    if 0 <= x < size and 0 <= y < size:
+                        self._set_function(x, y, max(abs(dx), abs(dy)) not in (2, 4))
+        positions = _alignment_positions(self.ver, size)
+        last = len(positions) - 1
+        for i, px in enumerate(positions):
+            for j, py in enumerate(positions):
+                if (i, j) in ((0, 0), (0, last), (last, 0)):
+                    continue
+                for dy in range(-2, 3):
+                    for dx in range(-2, 3):
+                        self._set_function(px + dx, py + dy, max(abs(dx), abs(dy)) != 1)
+        self.draw_format_bits(0)
+        if self.ver >= 7:
+            rem = self.ver
+            for _ in range(12):
+                rem = (rem << 1) ^ ((rem >> 11) * 0x1F25)
+            bits = self.ver << 12 | rem
+            for i in range(18):
+                bit = (bits >> i) & 1 != 0
+                a, b = size - 11 + i % 3, i // 3
+                self._set_function(a, b, bit)
+                self._set_function(b, a, bit)
+
+    def draw_format_bits(self, mask):
+        data = ECC_FORMAT_BITS[self.ecl] << 3 | mask
+        rem = data
+        for _ in range(10):
+            rem = (rem << 1) ^ ((rem >> 9) * 0x537)
+        bits = (data << 10 | rem) ^ 0x5412
+        bit = lambda i: (bits >> i) & 1 != 0
+        size = self.size
+        for i in range(6):
+            self._set_function(8, i, bit(i))
+        self._set_function(8, 7, bit(6))
+        self._set_function(8, 8, bit(7))
+        self._set_function(7, 8, bit(8))
+        for i in range(9, 15):
+            self._set_function(14 - i, 8, bit(i))
+        for i in range(8):
+            self._set_function(size - 1 - i, 8, bit(i))
+        for i in range(8, 15):
+            self._set_function(8, size - 15 + i, bit(i))
+        self._set_function(8, size - 8, True)
+
+    def draw_codewords(self, data):
+        i, size = 0, self.size
+        for right in range(size - 1, 0, -2):
+            if right <= 6:
+                right -= 1
+            upward = (right + 1) & 2 == 0
+            for vert in range(size):
+                y = size - 1 - vert if upward else vert
+                for j in range(2):
+                    x = right - j
+                    if not self.isfunction[y, x] and i < len(data) * 8:
+                        self.modules[y, x] = (data[i >> 3] >> (7 - (i & 7))) & 1 != 0
+                        i += 1
+
+    def apply_mask(self, mask):
+        y, x = np.indices(self.modules.shape)
+        self.modules ^= (MASK_PATTERNS[mask](x, y) == 0) & ~self.isfunction
+
+    def penalty(self):
+        # Standard N1-N4 penalty rules; only used to pick the most scannable mask. Rows and columns are
+        # scored as whole 2-D arrays rather than line by line.
+        size = self.size
+        grid = self.modules.astype(np.int8)
+        score = 0
+        for lines in (grid, grid.T):
+            # Sentinel columns split the rows; the 1-2 module sentinel runs never reach the length-5 rule.
+            flat = np.pad(lines, ((0, 0), (1, 1)), constant_values=-1).ravel()
+            runs = np.diff(np.flatnonzero(np.diff(flat) != 0))
+            score += int(np.sum(runs[runs >= 5] - 2))
+            windows = np.lib.stride_tricks.sliding_window_view(np.pad(lines, ((0, 0), (4, 4))), 11, axis=1)
+            for pattern in (FINDER_LIKE, FINDER_LIKE[::-1]):
+                score += 40 * int(np.sum(np.all(windows == pattern, axis=2)))
+        blocks = grid[:-1, :-1] + grid[1:, :-1] + grid[:-1, 1:] + grid[1:, 1:]
+        score += 3 * int(np.sum((blocks == 0) | (blocks == 4)))
+        total = size * size
+        dark = int(grid.sum())
+        score += 10 * ((abs(dark * 20 - total * 10) + total - 1) // total - 1)
+        return score
+
+FINDER_LIKE = np.array([1, 0, 1, 1, 1, 0, 1, 0, 0, 0, 0], dtype=np.int8)
+
+# --- 4. PUBLIC API ---
+def qr_matrix(text, ecl="M"):
+    payload = text.encode("utf-8")
+    for ver in range(1, MAX_VERSION + 1):
+        count_bits = 8 if ver <= 9 else 16
+        capacity_bits = _data_codewords(ver, ecl) * 8
+        if 4 + count_bits + 8 * len(payload) <= capacity_bits:
+            break
+    else:
+        raise ValueError(f"QR payload too long ({len(payload)} bytes) for version {MAX_VERSION}-{ecl}")
+
+    bits = [0, 1, 0, 0] + [(len(payload) >> i) & 1 for i in reversed(range(count_bits))]
+    for b in payload:
+        bits += [(b >> i) & 1 for i in reversed(range(8))]
+    bits += [0] * min(4, capacity_bits - len(bits))
+    bits += [0] * (-len(bits) % 8)
+    data = [int("".join(map(str, bits[i:i + 8])), 2) for i in range(0, len(bits), 8)]
+    pad = 0xEC
+    while len(data) < capacity_bits // 8:
+        data.append(pad)
+        pad ^= 0xEC ^ 0x11
+
+    symbol = _Symbol(ver, ecl)
+    symbol.draw_codewords(_add_ecc_and_interleave(data, ver, ecl))
+    best_mask, best_score = 0, None
+    for mask in range(8):
+        symbol.apply_mask(mask)
+        symbol.draw_format_bits(mask)
+        score = symbol.penalty()
+        if best_score is None or score < best_score:
+            best_mask, best_score = mask, score
+        symbol.apply_mask(mask)
+    symbol.apply_mask(best_mask)
+    symbol.draw_format_bits(best_mask)
+    return symbol.modules.copy()
+
+def qr_image(text, scale=6, border=4, ecl="M"):
+    matrix = np.pad(qr_matrix(text, ecl), border)
+    pixels = np.where(matrix, 0, 255).astype(np.uint8)
+    pixels = np.repeat(np.repeat(pixels, scale, axis=0), scale, axis=1)
+    return Image.fromarray(pixels)
@@ -0,0 +1,251 @@
+from fpdf import FPDF
+import datetime
+import io
+import zlib
+
+from tuklas.metrics import stage
+from tuklas.qr import qr_image
+
+# --- 1. IN-MEMORY IMAGE EMBEDDING ---
+# Thumbnails are printed at 43x35 mm; 516x420 px is ~300 dpi, so nothing larger is ever encoded.
+PDF_IMAGE_PX = (516, 420)
+
+def jpeg_image_info(img, quality=85):
+    img = img.convert("L" if img.mode == "L" else "RGB")
+    img.thumbnail(PDF_IMAGE_PX)
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=quality)
+    return {'w': img.width, 'h': img.height, 'cs': 'DeviceGray' if img.mode == "L" else 'DeviceRGB',
+            'bpc': 8, 'f': 'DCTDecode', 'data': buf.getvalue()}
+
+def flate_image_info(img):
+    # Lossless path for line art such as QR codes, where JPEG artefacts hurt scanning.
+    img = img.convert("L")
+    return {'w': img.width, 'h': img.height, 'cs': 'DeviceGray', 'bpc': 8,
+            'f': 'FlateDecode', 'data': zlib.compress(img.tobytes())}
+
+# --- 2. PROFESSIONAL PDF GENERATOR ---
+class _Buffer:
+    # FPDF grows its output with `self.buffer += s`, which copies the whole document on every line; for a
+    # multi-megabyte pen report that is quadratic. Parts are collected and joined once instead.
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def __iadd__(self, s):
+        self.parts.append(s)
+        self.size += len(s)
+        return self
+
+    def __len__(self):
+        return self.size
+
+class PDFReport(FPDF):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buffer = _Buffer()
+
+    def output(self, name='', dest=''):
+        if self.state < 3:
+            self.close()
+        if isinstance(self.buffer, _Buffer):
+            self.buffer = "".join(self.buffer.parts)
+        return super().output(name, dest)
+
+    def image_from_info(self, key, info, x, y, w, h):
+        # FPDF only parses files it has not seen; pre-registering the decoded info keeps everything in memory.
+        # FPDF numbers the entry and drops its data once written, so it gets a copy: the encoded bytes are shared,
+        # and one info can go into several documents (a case's own PDF and the batch report).
+        if key not in self.images:
+            self.images[key] = dict(info, i=len(self.images) + 1)
+        self.image(key, x=x, y=y, w=w, h=h)
+
+    def header(self):
+        self.set_fill_color(0, 51, 102) 
+        self.rect(0, 0, 210, 5, 'F')
+        self.ln(5)
+        self.set_font('Arial', 'B', 16)
+        self.set_text_color(0)
+        self.cell(0, 10, 'TUKLAS VETERINARY DIAGNOSTICS', 0, 1, 'L')
+        self.set_font('Arial', '', 10)
+        self.cell(0, 5, 'Rizal National Science High School (RiSci)', 0, 1, 'L')
+        self.cell(0, 5, 'J.P. Rizal St., Batingan, Binangonan, Rizal', 0, 1, 'L')
+        self.cell(0, 5, 'Phone: (02) 8652-2197 | Email: tuklas-risci@gmail.com', 0, 1, 'L')
+        self.set_y(15)
+        self.set_font('Arial', 'B', 20)
+        self.set_text_color(150) 
+        self.cell(0, 10, 'LABORATORY REPORT', 0, 1, 'R')
+        self.set_y(40) 
+        self.set_draw_color(0)
+        self.line(10, self.get_y(), 200, self.get_y())
+        self.ln(5)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font('Arial', 'I', 8)
+        self.set_text_color(128)
+        self.cell(0, 10, f'Page {self.page_no()} | Generated by TUKLAS AI', 0, 0, 'C')
+
+def clean_text(text):
+    if not isinstance(text, str): return str(text)
+    text = text.replace("🚨", "[CRITICAL]").replace("⚠️", "[WARNING]").replace("✅", "[OK]")
+    return text.encode('latin-1', 'ignore').decode('latin-1')
+
+def get_qr_code(data):
+    # Encoded locally so PDF generation never waits on (or fails without) the network.
+    try:
+        return qr_image(data)
+    except ValueError:
+        return None
+
+def qr_image_info(case_id):
+    qr_img = get_qr_code(f"https://tuklas-vet.com/verify/{case_id}")
+    return flate_image_info(qr_img) if qr_img else None
+
+def create_pdf(images, diagnosis, confidence, info, case_id=None, ranking=None, timer=None, tta=None):
+    pdf = PDFReport()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    # Stored cases pass the ID issued by the case store; an unsaved report has nothing to verify, so no QR code.
+    with stage(timer, "pdf.qr"):
+        qr = qr_image_info(case_id) if case_id else None
+    render_case(pdf, [jpeg_image_info(img) for img in images[:4]], diagnosis, confidence, info,
+                case_id or "Not stored", ranking, qr, tta=tta)
+    return pdf.output(dest='S').encode('latin-1')
+
+def render_case(pdf, panels, diagnosis, confidence, info, case_id, ranking=None, qr=None, key="", tta=None):
+    # One case on a fresh page. `panels` and `qr` are pre-encoded image infos, so a batch report encodes each
+    # image once (possibly in another process) and only lays pages out here; `key` keeps their names unique.
+    pdf.add_page()
+    pdf.ln(2)
+    pdf.set_font("Arial", "B", 10)
+    pdf.set_fill_color(240, 240, 240)
+    pdf.cell(0, 7, "CASE INFORMATION", 1, 1, 'L', fill=True)
+    pdf.set_font("Arial", "", 10)
+    pdf.cell(35, 7, "Case ID:", 1)
+    pdf.cell(60, 7, case_id, 1)
+    pdf.cell(35, 7, "Date Reported:", 1)
+    pdf.cell(60, 7, datetime.datetime.now().strftime('%Y-%m-%d'), 1, 1)
+    pdf.cell(35, 7, "Specimen Type:", 1)
+    pdf.cell(60, 7, "Digital Skin Image", 1)
+    pdf.cell(35, 7, "Methodology:", 1)
+    pdf.cell(60, 7, "AI-Computer Vision (YOLOv11)", 1, 1)
+    pdf.ln(2)
+    pdf.set_font("Arial", "B", 10)
+    pdf.cell(0, 6, "MULTI-SPECTRAL ANALYSIS", 0, 1, 'L')
+    y_start = pdf.get_y()
+    pdf.rect(10, y_start, 190, 45) 
+    x_positions = [12, 59, 106, 153]
+    labels = ["Raw Specimen", "AI Detection", "High Contrast", "Structural/Edge"]
+    for i, panel in enumerate(panels):
+        if i < 4: 
+            try:
+                pdf.image_from_info(f"{key}panel{i}", panel, x=x_positions[i], y=y_start+2, w=43, h=35)
+                pdf.set_xy(x_positions[i], y_start + 38)
+                pdf.set_font("Arial", "I", 8)
+                pdf.cell(43, 5, labels[i], 0, 0, 'C')
+            except:
+                pass
+    pdf.set_xy(10, y_start + 45)
+    pdf.ln(3)
+    pdf.set_fill_color(230, 230, 250) 
+    pdf.rect(10, pdf.get_y(), 190, 20, 'F')
+    pdf.set_font("Arial", "B", 11)
+    pdf.cell(95, 8, "DETECTED CLASSIFICATION:", 0, 0, 'R')
+    pdf.set_font("Arial", "B", 13)
+    pdf.set_text_color(0, 51, 102) 
+    pdf.cell(95, 8, f"  {clean_text(diagnosis.upper())}", 0, 1, 'L')
+    pdf.set_text_color(0)
+    pdf.set_font("Arial", "", 10)
+    pdf.cell(95, 6, "Confidence Score:", 0, 0, 'R')
+    pdf.cell(95, 6, f"  {confidence:.1f}%", 0, 1, 'L')
+    if tta:
+        # High-accuracy mode: how far the augmented views and extra weights agreed on this result.
+        pdf.cell(95, 6, "Model Agreement:", 0, 0, 'R')
+        pdf.cell(95, 6, f"  {tta['agreement'] * 100:.0f}% over {tta['runs']} views "
+                        f"(uncertainty {tta['uncertainty']:.2f})", 0, 1, 'L')
+    pdf.ln(2 if tta else 8)
+    if ranking:
+        pdf.set_font("Arial", "B", 11)
+        pdf.set_fill_color(240, 240, 240)
+        pdf.cell(0, 6, "ALL DETECTED CLASSES (RANKED BY SEVERITY & EVIDENCE)", 1, 1, 'L', fill=True)
+        widths = [80, 32, 16, 22, 20, 20]
+        pdf.set_font("Arial", "B", 8)
+        for w, title in zip(widths, ["Class", "Severity", "Boxes", "Mean Conf.", "Max Conf.", "Area"]):
+            pdf.cell(w, 5, title, 1, 0, 'C')
+        pdf.ln()
+        pdf.set_font("Arial", "", 8)
+        for r in ranking:
+            area = f"{r['area_pct']:.2f}%" if r.get("area_pct") is not None else "-"
+            values = [clean_text(r["class"]), r["severity"], str(r["count"]), f"{r['mean_confidence']:.1f}%",
+                      f"{r['max_confidence']:.1f}%", area]
+            for w, value in zip(widths, values):
+                pdf.cell(w, 5, value, 1, 0, 'L' if w == widths[0] else 'C')
+            pdf.ln()
+        pdf.ln(3)
+    if info:
+        pdf.set_font("Arial", "B", 11)
+        pdf.set_fill_color(240, 240, 240)
+        pdf.cell(0, 7, "CLINICAL INTERPRETATION & PROTOCOLS", 1, 1, 'L', fill=True)
+        pdf.ln(1)
+        pdf.set_font("Arial", "B", 10)
+        pdf.cell(30, 5, "Severity:", 0)
+        pdf.set_font("Arial", "", 10)
+        pdf.cell(0, 5, clean_text(info['severity']), 0, 1)
+        pdf.set_font("Arial", "B", 10)
+        pdf.cell(30, 5, "Etiology:", 0)
+        pdf.set_font("Arial", "", 10)
+        pdf.multi_cell(0, 5, clean_text(info['cause']))
+        pdf.ln(1)
+        pdf.set_font("Arial", "B", 11)
+        pdf.cell(0, 7, "RECOMMENDED TREATMENT PLAN", 0, 1, 'L')
+        pdf.line(10, pdf.get_y(), 200, pdf.get_y())
+        pdf.ln(2)
+        pdf.set_font("Arial", "", 10)
+        for i, step in enumerate(info['steps'], 1):
+            clean_step = clean_text(step)
+            pdf.cell(10, 5, f"{i}.", 0, 0)
+            pdf.multi_cell(0, 5, clean_step)
+        pdf.ln(5)
+    pdf.set_font("Arial", "B", 10)
+    pdf.cell(0, 6, "CLINICIAN NOTES & REMARKS:", 0, 1, 'L')
+    pdf.set_fill_color(248, 248, 248)
+    pdf.set_draw_color(200, 200, 200)
+    start_y_notes = pdf.get_y()
+    pdf.rect(10, start_y_notes, 190, 25, 'FD') 
+    pdf.set_draw_color(220, 220, 220)
+    pdf.line(12, start_y_notes + 8, 198, start_y_notes + 8)
+    pdf.line(12, start_y_notes + 16, 198, start_y_notes + 16)
+    pdf.set_xy(10, start_y_notes + 28) 
+    # The validation block is placed with absolute offsets, so it must start on a page with room for all of it.
+    if pdf.get_y() + 25 > pdf.h - pdf.b_margin:
+        pdf.add_page()
+    y_footer_start = pdf.get_y()
+    if qr:
+        pdf.image_from_info(f"{key}qr", qr, x=12, y=y_footer_start, w=22, h=22)
+    pdf.set_xy(38, y_footer_start + 5)
+    pdf.set_font("Arial", "B", 9)
+    pdf.cell(50, 5, "VALIDATION & FOLLOW-UP", 0, 1, 'L')
+    pdf.set_xy(38, y_footer_start + 10)
+    pdf.set_font("Arial", "", 8)
+    pdf.cell(50, 4, "Scan code to verify report authenticity.", 0, 1, 'L')
+    next_visit = (datetime.datetime.now() + datetime.timedelta(days=7)).strftime('%Y-%m-%d')
+    pdf.set_xy(38, y_footer_start + 15)
+    pdf.set_font("Arial", "B", 9)
+    pdf.cell(50, 5, f"Next Check-up: {next_visit}", 0, 1, 'L')
+    pdf.set_xy(110, y_footer_start)
+    pdf.set_font("Arial", "B", 10)
+    pdf.cell(90, 5, "Authorized Veterinarian:", 0, 1, 'C')
+    pdf.ln(8)
+    pdf.set_xy(110, y_footer_start + 12)
+    pdf.set_font("Courier", "", 12)
+    pdf.cell(90, 5, "__________________________", 0, 1, 'C')
+    pdf.set_xy(110, y_footer_start + 17)
+    pdf.set_font("Arial", "I", 8)
+    pdf.cell(90, 5, "Signature & License No.", 0, 1, 'C')
+    pdf.set_y(-25) 
+    pdf.set_font("Arial", "I", 7)
+    pdf.set_text_color(150)
+    disclaimer = ("DISCLAIMER: This analysis is computer-generated. "
+                  "It is intended to support, not replace, professional veterinary advice.")
+    pdf.multi_cell(0, 3, disclaimer, align='C')
+    pdf.set_text_color(0)
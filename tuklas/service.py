@@ -0,0 +1,141 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+import numpy as np
+
+from tuklas.metrics import REGISTRY, StageTimer
+
+class QueueFull(Exception):
+    pass
+
+# --- 1. TICKETS ---
+class Ticket:
+    def __init__(self, service, images, conf):
+        self.service = service
+        self.images = images
+        self.conf = conf
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+        self.started_at = None
+
+    def position(self):
+        # 1-based place in line; 0 once a worker has picked the request up.
+        return self.service.position(self)
+
+    def wait(self, timeout=None):
+        try:
+            return self.future.result(timeout)
+        except FutureTimeout:
+            return None
+
+    def done(self):
+        return self.future.done()
+
+    def result(self):
+        return self.future.result()
+
+# --- 2. MICRO-BATCHING WORKER ---
+class InferenceService:
+    # One worker thread owns the model; sessions enqueue tickets instead of calling predict concurrently.
+    # Waiting tickets are coalesced into a single batched call of up to `max_batch` images.
+    def __init__(self, model, max_queue=32, max_batch=8, batch_wait_ms=10):
+        self.model = model
+        self.name = model.name
+        self.names = model.names
+        self.max_queue = max_queue
+        self.max_batch = max_batch
+        self.batch_wait_s = batch_wait_ms / 1000
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._waits = deque(maxlen=500)
+        self.batches = 0
+        self.images = 0
+        self._worker = threading.Thread(target=self._run, name=f"tuklas-inference-{self.name}", daemon=True)
+        self._worker.start()
+
+    @property
+    def latency(self):
+        return self.model.latency
+
+    def submit(self, images, conf):
+        with self._cond:
+            if len(self._pending) >= self.max_queue:
+                raise QueueFull(f"Inference queue is full ({self.max_queue} requests waiting)")
+            ticket = Ticket(self, list(images), conf)
+            self._pending.append(ticket)
+            self._cond.notify()
+        return ticket
+
+    def position(self, ticket):
+        with self._cond:
+            try:
+                return self._pending.index(ticket) + 1
+            except ValueError:
+                return 0
+
+    def predict_detections(self, images, conf, on_wait=None):
+        ticket = self.submit(images, conf)
+        while not ticket.done():
+            if on_wait is not None:
+                on_wait(ticket)
+            ticket.wait(0.1)
+        return ticket.result()
+
+    def _take_batch(self):
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            # Give concurrent sessions a brief window to join this batch.
+            deadline = time.perf_counter() + self.batch_wait_s
+            while sum(len(t.images) for t in self._pending) < self.max_batch:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, size = [], 0
+            while self._pending and (not batch or size + len(self._pending[0].images) <= self.max_batch):
+                ticket = self._pending.popleft()
+                ticket.started_at = time.perf_counter()
+                batch.append(ticket)
+                size += len(ticket.images)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            images = [img for t in batch for img in t.images]
+            timer = StageTimer()
+            try:
+                with timer.stage("infer"):
+                    # One pass at the loosest threshold, then each ticket keeps only its own boxes.
+                    dets = self.model.predict_detections(images, min(t.conf for t in batch))
+            except Exception as e:
+                for t in batch:
+                    t.future.set_exception(e)
+                continue
+            # Under the lock, so stats() never iterates the deque while it is being appended to.
+            with self._cond:
+                self.batches += 1
+                self.images += len(images)
+                self._waits.extend(t.started_at - t.enqueued_at for t in batch)
+            i = 0
+            for t in batch:
+                t.future.set_result([d.filter(t.conf) for d in dets[i:i + len(t.images)]])
+                i += len(t.images)
+            timer.stages["wait"] = max(t.started_at - t.enqueued_at for t in batch)
+            REGISTRY.record(timer, kind="service")
+
+    def stats(self):
+        with self._cond:
+            depth, batches, images = len(self._pending), self.batches, self.images
+            waits = np.fromiter(self._waits, dtype=np.float64)
+        return {
+            "queue_depth": depth,
+            "batches": batches,
+            "images": images,
+            "mean_batch": round(images / batches, 2) if batches else 0.0,
+            "wait_p50_ms": round(float(np.percentile(waits, 50)) * 1000, 1) if len(waits) else 0.0,
+            "wait_p95_ms": round(float(np.percentile(waits, 95)) * 1000, 1) if len(waits) else 0.0,
+        }
@@ -0,0 +1,257 @@
+import datetime
+import json
+import os
+import sqlite3
+import threading
+
+# --- 1. SCHEMA ---
+# Case metadata and PDFs live in separate tables so listing and filtering never page report blobs in from disk.
+# The daily_* rollups are kept current inside the same transaction that inserts each case, so dashboards read a
+# few hundred pre-aggregated rows instead of re-reading every stored scan.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    case_id TEXT UNIQUE,
+    created_at TEXT NOT NULL,
+    farm TEXT NOT NULL DEFAULT '',
+    pen TEXT NOT NULL DEFAULT '',
+    image_hash TEXT NOT NULL,
+    model TEXT NOT NULL DEFAULT '',
+    diagnosis TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    confidence REAL NOT NULL,
+    detections TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS case_reports (
+    case_rowid INTEGER PRIMARY KEY REFERENCES cases(id) ON DELETE CASCADE,
+    pdf BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cases_created ON cases(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_cases_diagnosis ON cases(diagnosis, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_cases_farm ON cases(farm, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_cases_image ON cases(image_hash);
+CREATE INDEX IF NOT EXISTS idx_cases_pen ON cases(farm, pen, created_at, id);
+CREATE TABLE IF NOT EXISTS daily_scans (
+    day TEXT NOT NULL, farm TEXT NOT NULL, pen TEXT NOT NULL,
+    scans INTEGER NOT NULL, positive INTEGER NOT NULL,
+    PRIMARY KEY (day, farm, pen)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS daily_class (
+    day TEXT NOT NULL, farm TEXT NOT NULL, pen TEXT NOT NULL, class TEXT NOT NULL,
+    scans INTEGER NOT NULL, detections INTEGER NOT NULL, conf_sum REAL NOT NULL, conf_max REAL NOT NULL,
+    PRIMARY KEY (day, farm, pen, class)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS daily_confidence (
+    day TEXT NOT NULL, farm TEXT NOT NULL, pen TEXT NOT NULL, class TEXT NOT NULL, bucket INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    PRIMARY KEY (day, farm, pen, class, bucket)
+) WITHOUT ROWID;
+"""
+CONFIDENCE_BUCKETS = 10
+LIST_COLUMNS = "id, case_id, created_at, farm, pen, diagnosis, count, confidence"
+NEGATIVE = "No lesions"
+
+def format_case_id(rowid, created_at):
+    # Derived from the AUTOINCREMENT row id, which SQLite never reuses, so IDs cannot collide within a store.
+    return f"TK-{created_at[:10].replace('-', '')}-{rowid:05d}"
+
+# --- 2. CASE STORE ---
+class CaseStore:
+    def __init__(self, path):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(SCHEMA)
+
+    def _update_rollups(self, created_at, farm, pen, detections):
+        day = created_at[:10]
+        self._conn.execute(
+            "INSERT INTO daily_scans VALUES (?, ?, ?, 1, ?) ON CONFLICT (day, farm, pen) "
+            "DO UPDATE SET scans = scans + 1, positive = positive + excluded.positive",
+            (day, farm, pen, int(bool(detections))),
+        )
+        per_class = {}
+        for d in detections:
+            per_class.setdefault(d["class"], []).append(d["confidence"])
+        self._conn.executemany(
+            "INSERT INTO daily_class VALUES (?, ?, ?, ?, 1, ?, ?, ?) ON CONFLICT (day, farm, pen, class) "
+            "DO UPDATE SET scans = scans + 1, detections = detections + excluded.detections, "
+            "conf_sum = conf_sum + excluded.conf_sum, conf_max = MAX(conf_max, excluded.conf_max)",
+            [(day, farm, pen, name, len(confs), sum(confs), max(confs)) for name, confs in per_class.items()],
+        )
+        buckets = {}
+        for name, confs in per_class.items():
+            for c in confs:
+                key = (name, min(int(c * CONFIDENCE_BUCKETS), CONFIDENCE_BUCKETS - 1))
+                buckets[key] = buckets.get(key, 0) + 1
+        self._conn.executemany(
+            "INSERT INTO daily_confidence VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (day, farm, pen, class, bucket) "
+            "DO UPDATE SET n = n + excluded.n",
+            [(day, farm, pen, name, bucket, n) for (name, bucket), n in buckets.items()],
+        )
+
+    def add_case(self, image_hash, detections, diagnosis, confidence, farm="", pen="", model="", created_at=None):
+        # `detections` is Detections.to_list() output; returns the new case ID.
+        return self.add_cases([dict(image_hash=image_hash, detections=detections, diagnosis=diagnosis,
+                                    confidence=confidence, farm=farm, pen=pen, model=model, created_at=created_at)])[0]
+
+    def add_cases(self, records):
+        # One transaction for a whole batch: a single fsync instead of one per image. Records are add_case kwargs.
+        case_ids = []
+        with self._lock, self._conn:
+            for r in records:
+                created_at = r.get("created_at") or datetime.datetime.now().isoformat(timespec="seconds")
+                farm, pen = (r.get("farm") or "").strip(), (r.get("pen") or "").strip()
+                cur = self._conn.execute(
+                    "INSERT INTO cases (created_at, farm, pen, image_hash, model, diagnosis, count, confidence, detections) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (created_at, farm, pen, r["image_hash"], r.get("model", ""), r["diagnosis"] or NEGATIVE,
+                     len(r["detections"]), round(float(r["confidence"]), 2), json.dumps(r["detections"])),
+                )
+                case_id = format_case_id(cur.lastrowid, created_at)
+                self._conn.execute("UPDATE cases SET case_id = ? WHERE id = ?", (case_id, cur.lastrowid))
+                self._update_rollups(created_at, farm, pen, r["detections"])
+                case_ids.append(case_id)
+        return case_ids
+
+    def attach_report(self, case_id, pdf_bytes):
+        self.attach_reports([(case_id, pdf_bytes)])
+
+    def attach_reports(self, reports):
+        # (case_id, pdf_bytes) pairs in one transaction, as add_cases does for a batch of scans.
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO case_reports (case_rowid, pdf) SELECT id, ? FROM cases WHERE case_id = ?",
+                [(sqlite3.Binary(pdf_bytes), case_id) for case_id, pdf_bytes in reports],
+            )
+
+    def get_case(self, case_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cases.*, case_reports.case_rowid IS NOT NULL AS has_report FROM cases "
+                "LEFT JOIN case_reports ON case_reports.case_rowid = cases.id WHERE case_id = ?", (case_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        case = dict(row)
+        case["detections"] = json.loads(case["detections"])
+        return case
+
+    def get_report(self, case_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT pdf FROM case_reports JOIN cases ON cases.id = case_reports.case_rowid WHERE case_id = ?",
+                (case_id,),
+            ).fetchone()
+        return bytes(row["pdf"]) if row else None
+
+    @staticmethod
+    def _where(date_from=None, date_to=None, diagnosis=None, farm=None, pen=None):
+        clauses, params = [], []
+        if date_from:
+            clauses.append("created_at >= ?")
+            params.append(str(date_from))
+        if date_to:
+            # Inclusive end date: everything before the following midnight.
+            clauses.append("created_at < ?")
+            params.append(str(datetime.date.fromisoformat(str(date_to)) + datetime.timedelta(days=1)))
+        if diagnosis:
+            clauses.append("diagnosis = ?")
+            params.append(diagnosis)
+        if farm:
+            clauses.append("farm = ?")
+            params.append(farm.strip())
+        if pen:
+            clauses.append("pen = ?")
+            params.append(pen.strip())
+        return clauses, params
+
+    def page(self, limit=25, after=None, **filters):
+        # Keyset pagination, newest first: `after` is the (created_at, id) of the last row of the previous page,
+        # so every page is one index range scan regardless of how deep the user has scrolled.
+        clauses, params = self._where(**filters)
+        if after is not None:
+            clauses.append("(created_at, id) < (?, ?)")
+            params.extend(after)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {LIST_COLUMNS} FROM cases {where} ORDER BY created_at DESC, id DESC LIMIT ?",
+                params + [limit + 1],
+            ).fetchall()
+        rows = [dict(r) for r in rows]
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        cursor = (rows[-1]["created_at"], rows[-1]["id"]) if has_more else None
+        return rows, cursor
+
+    def count(self, **filters):
+        clauses, params = self._where(**filters)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM cases {where}", params).fetchone()[0]
+
+    def distinct(self, column):
+        if column not in ("diagnosis", "farm", "pen"):
+            raise ValueError(f"Cannot list distinct values of '{column}'")
+        # Served from the column's index without touching the table rows.
+        with self._lock:
+            rows = self._conn.execute(f"SELECT DISTINCT {column} FROM cases ORDER BY {column}").fetchall()
+        return [r[0] for r in rows if r[0]]
+
+    def _rollup_where(self, since, farm=None, pen=None):
+        clauses, params = ["day >= ?"], [str(since)]
+        if farm is not None:
+            clauses.append("farm = ?")
+            params.append(farm)
+        if pen is not None:
+            clauses.append("pen = ?")
+            params.append(pen)
+        return " AND ".join(clauses), params
+
+    def herd_totals(self, since, farm=None, pen=None):
+        where, params = self._rollup_where(since, farm, pen)
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT COALESCE(SUM(scans), 0), COALESCE(SUM(positive), 0) FROM daily_scans WHERE {where}", params
+            ).fetchone()
+        return {"scans": row[0], "positive": row[1]}
+
+    def daily_trend(self, since, farm=None, pen=None):
+        where, params = self._rollup_where(since, farm, pen)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT day, class, SUM(scans) AS scans, SUM(detections) AS detections, "
+                f"SUM(conf_sum) / SUM(detections) AS mean_conf FROM daily_class WHERE {where} "
+                f"GROUP BY day, class ORDER BY day", params
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def pen_breakdown(self, since, farm=None):
+        where, params = self._rollup_where(since, farm)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT farm, pen, class, SUM(scans) AS scans, SUM(detections) AS detections, "
+                f"MAX(conf_max) AS conf_max, MAX(day) AS last_seen FROM daily_class WHERE {where} "
+                f"GROUP BY farm, pen, class ORDER BY farm, pen, class", params
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def confidence_histogram(self, since, farm=None, pen=None):
+        where, params = self._rollup_where(since, farm, pen)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT class, bucket, SUM(n) AS n FROM daily_confidence WHERE {where} "
+                f"GROUP BY class, bucket ORDER BY class, bucket", params
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
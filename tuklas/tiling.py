@@ -0,0 +1,75 @@
+import math
+
+import numpy as np
+
+from tuklas.boxes import batched_nms, box_ios
+from tuklas.core import Detections, predict
+
+# --- 1. TILE GRID ---
+# Photos whose long side is at least this many model input sizes are tiled in "auto" mode.
+TILE_TRIGGER = 2.0
+TILE_OVERLAP = 0.2
+MAX_TILES_PER_SIDE = 4
+# Tile boxes are merged with intersection-over-smaller, so a lesion clipped at one tile's edge folds into
+# the complete box from its neighbour instead of surviving as a duplicate fragment.
+MERGE_THRESHOLD = 0.5
+
+def image_size(img):
+    return (img.shape[1], img.shape[0]) if isinstance(img, np.ndarray) else img.size
+
+def needs_tiling(img, tile_size=640, mode="auto"):
+    if mode == "on":
+        return True
+    if mode == "off":
+        return False
+    return max(image_size(img)) >= TILE_TRIGGER * tile_size
+
+def _starts(length, tile, overlap):
+    if length <= tile:
+        return [0]
+    count = math.ceil((length - tile * overlap) / (tile * (1 - overlap)))
+    return np.linspace(0, length - tile, count).round().astype(int).tolist()
+
+def tile_grid(width, height, tile_size=640, overlap=TILE_OVERLAP, max_per_side=MAX_TILES_PER_SIDE):
+    # Square tiles of at least tile_size, grown so the long side never needs more than max_per_side of them;
+    # each tile is still resized to the model input, but at 3-4x the magnification of a single pass.
+    long_side = max(width, height)
+    per_side = max(1, min(max_per_side, math.ceil((long_side - tile_size * overlap) / (tile_size * (1 - overlap)))))
+    tile = max(tile_size, math.ceil(long_side / (per_side - (per_side - 1) * overlap)))
+    tw, th = min(tile, width), min(tile, height)
+    return [(x, y, x + tw, y + th) for y in _starts(height, th, overlap) for x in _starts(width, tw, overlap)]
+
+def crop(img, box):
+    x1, y1, x2, y2 = box
+    return img[y1:y2, x1:x2] if isinstance(img, np.ndarray) else img.crop(box)
+
+# --- 2. TILED PREDICTION ---
+def merge_detections(parts, offsets, threshold=MERGE_THRESHOLD):
+    xyxy = np.concatenate([d.xyxy + np.asarray([x, y, x, y], dtype=np.float32) for d, (x, y) in zip(parts, offsets)])
+    conf = np.concatenate([d.conf for d in parts])
+    cls = np.concatenate([d.cls for d in parts])
+    keep = batched_nms(xyxy, conf, cls, threshold, metric=box_ios)
+    if len(keep) == 0:
+        return Detections(xyxy, conf, cls)
+    # Each surviving box grows to cover the fragments it suppressed, owned by the highest-scoring match.
+    overlap = (box_ios(xyxy[keep], xyxy) > threshold) & (cls[keep][:, None] == cls[None, :])
+    owner, absorbed = overlap.argmax(axis=0), overlap.any(axis=0)
+    merged = xyxy[keep].copy()
+    np.minimum.at(merged[:, :2], owner[absorbed], xyxy[absorbed, :2])
+    np.maximum.at(merged[:, 2:], owner[absorbed], xyxy[absorbed, 2:])
+    return Detections(merged, conf[keep], cls[keep])
+
+def predict_tiled(model, img, conf, tile_size=640, overlap=TILE_OVERLAP, **kwargs):
+    # Every tile plus the whole frame go through the model as one batch; the whole-frame pass keeps large
+    # lesions that no single tile contains.
+    width, height = image_size(img)
+    grid = tile_grid(width, height, tile_size, overlap)
+    if len(grid) == 1:
+        return predict(model, [img], conf, **kwargs)[0]
+    parts = predict(model, [crop(img, box) for box in grid] + [img], conf, **kwargs)
+    return merge_detections(parts, [box[:2] for box in grid] + [(0, 0)])
+
+def predict_image(model, img, conf, tiling="auto", tile_size=640, **kwargs):
+    if needs_tiling(img, tile_size, tiling):
+        return predict_tiled(model, img, conf, tile_size, **kwargs)
+    return predict(model, [img], conf, **kwargs)[0]
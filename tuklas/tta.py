@@ -0,0 +1,155 @@
+import time
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from tuklas.boxes import box_iou
+from tuklas.core import DETECTION_FLOOR, Detections, predict
+from tuklas.tiling import image_size
+
+# --- 1. VIEWS ---
+# Most informative first, so a tight latency budget keeps the views that matter: (name, scale, hflip, vflip).
+# Scaled views shrink the photo onto a grey canvas of the original size, so the model sees lesions smaller.
+VIEWS = (
+    ("original", 1.0, False, False),
+    ("hflip", 1.0, True, False),
+    ("scale-0.83", 0.83, False, False),
+    ("vflip", 1.0, False, True),
+    ("hflip-scale-0.67", 0.67, True, False),
+)
+PAD_COLOR = (114, 114, 114)
+FUSION_IOU = 0.55
+# Smoothing for the measured per-view cost; a model not timed yet runs the original view alone and plans from that.
+COST_SMOOTHING = 0.3
+
+def make_view(img, scale, hflip, vflip):
+    view = img.convert("RGB")
+    if hflip:
+        view = ImageOps.mirror(view)
+    if vflip:
+        view = ImageOps.flip(view)
+    if scale != 1.0:
+        canvas = Image.new("RGB", view.size, PAD_COLOR)
+        canvas.paste(view.resize((round(view.width * scale), round(view.height * scale)), Image.Resampling.BILINEAR))
+        view = canvas
+    return view
+
+def unmap_boxes(xyxy, size, scale, hflip, vflip):
+    width, height = size
+    xyxy = xyxy / scale
+    if vflip:
+        xyxy = np.stack([xyxy[:, 0], height - xyxy[:, 3], xyxy[:, 2], height - xyxy[:, 1]], 1)
+    if hflip:
+        xyxy = np.stack([width - xyxy[:, 2], xyxy[:, 1], width - xyxy[:, 0], xyxy[:, 3]], 1)
+    return xyxy
+
+# --- 2. WEIGHTED BOX FUSION ---
+def weighted_box_fusion(runs, iou_threshold=FUSION_IOU):
+    # `runs` is one Detections per (model, view) in original-image pixels. Same-class boxes that overlap a cluster
+    # are averaged into it, weighted by score. A fused box's confidence is its mean score scaled by the share of
+    # runs that found it, so a lesion seen by one view in five cannot outrank one every view agrees on.
+    # Returns the fused Detections and, per box, that share ("agreement").
+    n_runs = len(runs)
+    xyxy = np.concatenate([d.xyxy for d in runs]) if runs else np.zeros((0, 4), np.float32)
+    conf = np.concatenate([d.conf for d in runs]) if runs else np.zeros(0, np.float32)
+    cls = np.concatenate([d.cls for d in runs]) if runs else np.zeros(0, np.int64)
+    run_id = np.concatenate([np.full(len(d), i) for i, d in enumerate(runs)]) if runs else np.zeros(0, np.int64)
+    fused_xyxy, fused_conf, fused_cls, agreement = [], [], [], []
+    for c in np.unique(cls):
+        idx = np.flatnonzero(cls == c)
+        idx = idx[np.argsort(-conf[idx], kind="stable")]
+        boxes, members = [], []
+        for i in idx:
+            if boxes:
+                iou = box_iou(xyxy[i:i + 1], np.asarray(boxes))[0]
+                best = int(iou.argmax())
+                if iou[best] > iou_threshold:
+                    members[best].append(i)
+                    m = np.asarray(members[best])
+                    boxes[best] = (xyxy[m] * conf[m, None]).sum(0) / conf[m].sum()
+                    continue
+            boxes.append(xyxy[i].copy())
+            members.append([i])
+        for box, m in zip(boxes, members):
+            m = np.asarray(m)
+            share = len(np.unique(run_id[m])) / n_runs
+            fused_xyxy.append(box)
+            fused_conf.append(conf[m].mean() * share)
+            fused_cls.append(c)
+            agreement.append(share)
+    if not fused_xyxy:
+        return Detections(np.zeros((0, 4)), [], []), np.zeros(0, np.float32)
+    order = np.argsort(-np.asarray(fused_conf), kind="stable")
+    dets = Detections(np.asarray(fused_xyxy)[order], np.asarray(fused_conf)[order], np.asarray(fused_cls)[order])
+    return dets, np.asarray(agreement, dtype=np.float32)[order]
+
+# --- 3. BUDGETED ENSEMBLE ---
+class TTAEnsemble:
+    # High-accuracy mode: up to `max_views` augmented views of the photo through each model (best.pt first, then
+    # any extra weight files), one batched call per model, fused with WBF. Views are dropped, last first, until the
+    # predicted cost fits `budget_ms`; the original view through the first model always runs.
+    def __init__(self, models, budget_ms=2000, max_views=len(VIEWS)):
+        self.models = list(models)
+        self.budget_ms = budget_ms
+        self.max_views = max(1, min(max_views, len(VIEWS)))
+        # Per-view cost in ms for each model, seeded from its own latency stats when it has already scanned.
+        self.view_ms = [getattr(getattr(m, "latency", None), "mean_ms", 0.0) or None for m in self.models]
+        self.names = self.models[0].names
+
+    def plan(self, budget_ms):
+        # (model index, view index) pairs in priority order: every model's original view, then every model's
+        # first flip, and so on; the longest prefix whose estimated cost fits the budget is run.
+        order = [(m, v) for v in range(self.max_views) for m in range(len(self.models))]
+        chosen, spent = [order[0]], self.view_ms[0] or 0.0
+        for m, v in order[1:]:
+            # An extra model that has not run yet is assumed to cost as much as the first one.
+            cost = self.view_ms[m] or self.view_ms[0] or 0.0
+            if spent + cost > budget_ms:
+                break
+            chosen.append((m, v))
+            spent += cost
+        return chosen
+
+    def _run(self, img, pairs, conf, **kwargs):
+        runs = []
+        for m in sorted({m for m, _ in pairs}):
+            views = [VIEWS[v] for mm, v in pairs if mm == m]
+            t = time.perf_counter()
+            parts = predict(self.models[m], [make_view(img, *view[1:]) for view in views], conf, **kwargs)
+            per_view = (time.perf_counter() - t) * 1000 / len(views)
+            prev = self.view_ms[m]
+            self.view_ms[m] = per_view if prev is None else (1 - COST_SMOOTHING) * prev + COST_SMOOTHING * per_view
+            for view, dets in zip(views, parts):
+                runs.append((m, view[0], Detections(unmap_boxes(dets.xyxy, image_size(img), *view[1:]),
+                                                    dets.conf, dets.cls)))
+        return runs
+
+    def predict(self, img, conf, **kwargs):
+        # Returns (Detections at `conf`, summary). Views are scored at DETECTION_FLOOR so weak boxes still vote.
+        t = time.perf_counter()
+        floor = min(conf, DETECTION_FLOOR)
+        if self.view_ms[0] is None:
+            # Untimed model: run the original view alone, then plan the rest of the budget from its measured cost.
+            runs = self._run(img, [(0, 0)], floor, **kwargs)
+            pairs = self.plan(self.budget_ms)[1:]
+            runs += self._run(img, pairs, floor, **kwargs) if pairs else []
+        else:
+            runs = self._run(img, self.plan(self.budget_ms), floor, **kwargs)
+        fused, agreement = weighted_box_fusion([d for _, _, d in runs])
+        keep = fused.conf >= conf
+        dets, agreement = Detections(fused.xyxy[keep], fused.conf[keep], fused.cls[keep]), agreement[keep]
+        if len(dets):
+            score = float((agreement * dets.conf).sum() / dets.conf.sum())
+        else:
+            # A negative result is as certain as the share of runs that also found nothing at this sensitivity.
+            score = float(np.mean([not (d.conf >= conf).any() for _, _, d in runs]))
+        return dets, {
+            "agreement": round(score, 3),
+            "uncertainty": round(1 - score, 3),
+            "runs": len(runs),
+            "views": sorted({v for _, v, _ in runs}, key=[v[0] for v in VIEWS].index),
+            "models": len({m for m, _, _ in runs}),
+            "box_agreement": agreement.round(3).tolist(),
+            "elapsed_ms": round((time.perf_counter() - t) * 1000, 1),
+            "budget_ms": self.budget_ms,
+        }
@@ -0,0 +1,157 @@
+import datetime
+import math
+import os
+import time
+
+import numpy as np
+
+from tuklas.cache import bytes_hash, file_hash
+from tuklas.core import class_evidence, predict, rank_evidence
+from tuklas.knowledge import knowledge_index
+
+# --- 1. RUNNING AGGREGATE ---
+class StreamAggregate:
+    # Constant memory regardless of video length: running per-class evidence arrays plus the single best frame.
+    # The summary is ranked by the same helper as a still photo's, so both share one schema.
+    def __init__(self, names):
+        self.names = names
+        self.evidence = [np.zeros(len(knowledge_index(names).severity)) for _ in range(4)]
+        self.frames_with_class = np.zeros(len(self.evidence[0]), dtype=np.int64)
+        self.frames_scanned = 0
+        self.frames_positive = 0
+        self.best_frame = None
+        self.best_conf = 0.0
+        self.best_frame_index = None
+
+    def add(self, frame_index, frame, dets):
+        self.frames_scanned += 1
+        if len(dets) == 0:
+            return
+        self.frames_positive += 1
+        counts, conf_sum, conf_max, area = class_evidence(dets, len(self.frames_with_class))
+        if len(counts) > len(self.frames_with_class):
+            grow = len(counts) - len(self.frames_with_class)
+            self.evidence = [np.pad(a, (0, grow)) for a in self.evidence]
+            self.frames_with_class = np.pad(self.frames_with_class, (0, grow))
+        self.evidence[0] += counts
+        self.evidence[1] += conf_sum
+        np.maximum(self.evidence[2], conf_max, out=self.evidence[2])
+        self.evidence[3] += area
+        self.frames_with_class += counts > 0
+        top = float(dets.conf.max())
+        if top > self.best_conf:
+            self.best_conf, self.best_frame, self.best_frame_index = top, (frame, dets), frame_index
+
+    def summary(self):
+        ranking = rank_evidence(self.names, *self.evidence)
+        for r in ranking:
+            r["frames"] = int(self.frames_with_class[r["class_id"]])
+        return {
+            "classes": [r["class"] for r in ranking],
+            "count": int(self.evidence[0].sum()),
+            # The headline class's own mean, as for stills, so Healthy boxes elsewhere in the clip cannot dilute it.
+            "confidence": ranking[0]["mean_confidence"] if ranking else 0.0,
+            "ranking": ranking,
+            "frames_scanned": self.frames_scanned,
+            "frames_positive": self.frames_positive,
+        }
+
+def video_case_record(image_hash, agg, **fields):
+    # One stored case per video scan: the headline class over all scanned frames, with the strongest frame's boxes
+    # as its detections, so herd rollups count a lesion once rather than once per frame it appeared in.
+    summary = agg.summary()
+    boxes = agg.best_frame[1].to_list(agg.names) if agg.best_frame is not None else []
+    return dict(image_hash=image_hash, detections=boxes, diagnosis=summary["classes"][0] if summary["classes"] else None,
+                confidence=summary["confidence"], **fields)
+
+# --- 2. FRAME SOURCE ---
+def open_source(source):
+    import cv2
+    # "0", "1", ... select a local camera; anything else is a file path or stream URL (rtsp://, http://).
+    cap = cv2.VideoCapture(int(source) if str(source).isdigit() else source)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video source: {source}")
+    return cap
+
+def is_live_source(source):
+    return str(source).isdigit() or "://" in str(source)
+
+def source_hash(source):
+    if os.path.isfile(str(source)):
+        return file_hash(source)
+    # A live source has no fixed bytes: its index or URL plus the scan time identify the recording.
+    return bytes_hash(f"{source}@{datetime.datetime.now().isoformat()}".encode())
+
+# --- 3. STREAMING SCAN ---
+def scan_stream(model, source, conf, batch_size=8, realtime=True, max_frames=None, max_seconds=None, on_batch=None):
+    # Frames are decoded in order but only every `stride`-th one is retrieved and scanned. With realtime=True
+    # the stride adapts after each batch so scanning keeps pace with the source's own frame rate.
+    import cv2
+    cap = open_source(source)
+    src_fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+    if not 1.0 <= src_fps <= 240.0:
+        src_fps = 30.0
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    agg = StreamAggregate(model.names)
+    stride = 1
+    frame_index = -1
+    frames_read = 0
+    batch = []
+    start = time.perf_counter()
+    infer_s = 0.0
+    try:
+        while True:
+            if max_frames is not None and agg.frames_scanned + len(batch) >= max_frames:
+                break
+            if max_seconds is not None and time.perf_counter() - start >= max_seconds:
+                break
+            if not cap.grab():
+                break
+            frame_index += 1
+            frames_read += 1
+            if frame_index % stride != 0:
+                continue
+            ok, frame = cap.retrieve()
+            if not ok:
+                break
+            batch.append((frame_index, frame))
+            if len(batch) < batch_size:
+                continue
+            infer_s += _scan_batch(model, batch, conf, agg)
+            batch = []
+            if realtime:
+                scan_fps = agg.frames_scanned / infer_s if infer_s > 0 else src_fps
+                stride = max(1, math.ceil(src_fps / scan_fps))
+            if on_batch is not None:
+                on_batch(agg, _progress(agg, frames_read, total_frames, stride, start))
+        if batch:
+            infer_s += _scan_batch(model, batch, conf, agg)
+    finally:
+        cap.release()
+    progress = _progress(agg, frames_read, total_frames, stride, start)
+    if on_batch is not None:
+        on_batch(agg, progress)
+    summary = agg.summary()
+    summary.update(progress)
+    summary["source_fps"] = round(src_fps, 2)
+    return agg, summary
+
+def _scan_batch(model, batch, conf, agg):
+    t = time.perf_counter()
+    # Frames stay BGR ndarrays, the same convention ultralytics uses for array input.
+    results = predict(model, [frame for _, frame in batch], conf)
+    elapsed = time.perf_counter() - t
+    for (idx, frame), dets in zip(batch, results):
+        agg.add(idx, frame, dets)
+    return elapsed
+
+def _progress(agg, frames_read, total_frames, stride, start):
+    elapsed = time.perf_counter() - start
+    return {
+        "frames_read": frames_read,
+        "frames_total": total_frames,
+        "stride": stride,
+        "elapsed_s": round(elapsed, 2),
+        "scan_fps": round(agg.frames_scanned / elapsed, 2) if elapsed > 0 else 0.0,
+        "decode_fps": round(frames_read / elapsed, 2) if elapsed > 0 else 0.0,
+    }